@@ -24,11 +24,14 @@ Requirements:
 
 import os
 import sys
+import errno
+import json
 import shutil
 import subprocess
 import threading
 import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import tkinter as tk
@@ -41,6 +44,14 @@ DELETABLE_EXTENSIONS = {".avi", ".erd"}  # Q7: hard-coded list is fine
 RENAME_SUFFIX = "_verified_stpAcln"      # matches if any existing patterns should change.
 #DEFAULT_WINRAR_PATH = r"C:\Program Files\WinRAR\WinRAR.exe"
 DEFAULT_RAR_PATH = r"C:\Program Files\WinRAR\rar.exe"
+SIZE_CACHE_NAME = "size_cache.json"      # under logs/, survives restarts
+SIZE_SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # subject folder walks are I/O-latency bound
+ROBOCOPY_THREADS = 16                    # /MT for cross-volume deletable moves
+LOG_POLL_BUSY_MS = 100                   # log pane refresh while lines arrive
+LOG_POLL_IDLE_MS = 500                   # ... and when the queue is idle
+LOG_FLUSH_EVERY = 50                     # run log: flush after this many lines
+LOG_FLUSH_SEC = 1.0                      # ... or this many seconds
+MOVE_COPY_BUFSIZE = 8 * 1024 * 1024      # cross-volume move fallback read size
 
 # -------------------------
 # Utility helpers
@@ -62,14 +73,24 @@ def safe_makedirs(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
 def folder_size_bytes(folder: Path) -> int:
+    """Total size of all files under folder (scandir walk, one stat per file at most)."""
     total = 0
-    for root, dirs, files in os.walk(folder):
-        for name in files:
-            try:
-                fp = Path(root) / name
-                total += fp.stat().st_size
-            except Exception:
-                pass
+    stack = [os.fspath(folder)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                    else:
+                        total += entry.stat().st_size
+                except OSError:
+                    pass
     return total
 
 def run_subprocess_blocking(cmd_list, cwd=None) -> int:
@@ -83,21 +104,17 @@ def run_subprocess_blocking(cmd_list, cwd=None) -> int:
             startupinfo = subprocess.STARTUPINFO()
             startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # hide if any window style is used
 
-        p = subprocess.Popen(
+        # Output is never shown, so discard it in the OS instead of reading
+        # and decoding it line by line; only the exit code matters.
+        p = subprocess.run(
             cmd_list,
             cwd=cwd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             startupinfo=startupinfo,
             creationflags=creationflags,
             stdin=subprocess.DEVNULL,
         )
-        # Stream output to keep the UI responsive
-        while True:
-            line = p.stdout.readline()
-            if not line and p.poll() is not None:
-                break
         return p.returncode
     except FileNotFoundError:
         return -127
@@ -105,6 +122,50 @@ def run_subprocess_blocking(cmd_list, cwd=None) -> int:
         return -128
 
 
+def dir_is_nonempty(p: Path) -> bool:
+    """True if directory p has at least one entry (False if p is missing)."""
+    try:
+        it = os.scandir(p)
+    except FileNotFoundError:
+        return False
+    with it:
+        return next(it, None) is not None
+
+def move_no_clobber(src: str, dst: str):
+    """
+    Move src -> dst with a plain rename when both are on the same volume,
+    falling back to shutil.move across volumes. Never replaces an existing
+    dst: raises FileExistsError instead (Windows rename already refuses;
+    POSIX rename would overwrite, so it is checked first there).
+    """
+    if os.name != "nt" and os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, "Destination exists", dst)
+    try:
+        os.rename(src, dst)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, "Destination exists", dst)
+        shutil.move(src, dst, copy_function=copy_large)
+
+def copy_large(src, dst):
+    """
+    shutil.copy2 for the cross-volume move fallback. On Windows copyfile loops
+    readinto() with shutil's 1 MiB buffer; multi-GB AVI/ERD files copy faster
+    with MOVE_COPY_BUFSIZE reads. Elsewhere copy2 already uses the OS fast path.
+    """
+    if os.name != "nt":
+        return shutil.copy2(src, dst)
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, MOVE_COPY_BUFSIZE)
+    shutil.copystat(src, dst)
+    return dst
+
 def move_tree(src: Path, dst: Path, dry_run: bool, log):
     """
     Move entire folder tree src -> dst (dst becomes src's new location).
@@ -122,14 +183,56 @@ def move_tree(src: Path, dst: Path, dry_run: bool, log):
     target = dst
     if dst.exists() and dst.is_dir():
         target = dst / src.name
-    # If target exists already, choose a unique suffix
+    # Across volumes on Windows shutil.move would copy + delete entry by entry;
+    # hand a fresh target to one multi-threaded robocopy /MOVE instead.
+    if (os.name == "nt" and not os.path.lexists(target)
+            and not same_volume(src, target)):
+        if robocopy_move(src, [], target, log, whole_tree=True):
+            try:
+                os.rmdir(src)
+            except OSError:
+                pass
+            log(f"[MOVE] {src} -> {target}")
+            return
+    # If target exists already, choose a unique suffix (probe by attempting the move)
     final_target = target
     k = 1
-    while final_target.exists():
-        final_target = Path(str(target) + f"_dup{k}")
-        k += 1
+    while True:
+        try:
+            move_no_clobber(str(src), str(final_target))
+            break
+        except FileExistsError:
+            final_target = Path(str(target) + f"_dup{k}")
+            k += 1
     log(f"[MOVE] {src} -> {final_target}")
-    shutil.move(str(src), str(final_target))
+
+def same_volume(src: Path, dst: Path) -> bool:
+    """True if dst (or its nearest existing parent) is on src's volume."""
+    probe = dst
+    while not probe.exists() and probe.parent != probe:
+        probe = probe.parent
+    try:
+        return os.stat(src).st_dev == os.stat(probe).st_dev
+    except OSError:
+        return True
+
+def robocopy_move(src_folder: Path, patterns, dst_folder: Path, log, whole_tree: bool = False) -> bool:
+    """
+    One multi-threaded robocopy move; True on success (rc < 8).
+    Default moves the files matching patterns (/MOV /S); whole_tree moves
+    everything including empty folders (/MOVE /E).
+    """
+    mode = ["/MOVE", "/E"] if whole_tree else ["/MOV", "/S"]
+    cmd = ["robocopy", str(src_folder), str(dst_folder), *patterns,
+           *mode, "/R:1", "/W:1", f"/MT:{ROBOCOPY_THREADS}",
+           "/NJH", "/NJS", "/NFL", "/NDL", "/NP"]
+    log(f"[CMD] {' '.join(cmd)}")
+    rc = run_subprocess_blocking(cmd)
+    if 0 <= rc < 8:
+        log(f"[MOVE] robocopy done (rc={rc})")
+        return True
+    log(f"[WARN] robocopy rc={rc}; falling back to Python moves")
+    return False
 
 def move_selected_extensions(src_folder: Path, exts: set[str], dst_folder: Path, dry_run: bool, log):
     """
@@ -137,9 +240,16 @@ def move_selected_extensions(src_folder: Path, exts: set[str], dst_folder: Path,
     Only files directly under src_folder tree are processed.
     """
     exts_low = {e.lower() for e in exts}
+    # Cross-volume on Windows each file would be copied + deleted one by one;
+    # a single robocopy batch does it with native multi-threaded I/O. Only into
+    # a fresh destination, so no _dupN collision handling is needed.
+    if (not dry_run and os.name == "nt" and not dst_folder.exists()
+            and not same_volume(src_folder, dst_folder)):
+        if robocopy_move(src_folder, sorted(f"*{e}" for e in exts_low), dst_folder, log):
+            return
     for root, dirs, files in os.walk(src_folder):
         for name in files:
-            ext = Path(name).suffix.lower()
+            ext = os.path.splitext(name)[1].lower()
             if ext in exts_low:
                 rel = Path(root).relative_to(src_folder)
                 src_path = Path(root) / name
@@ -149,14 +259,17 @@ def move_selected_extensions(src_folder: Path, exts: set[str], dst_folder: Path,
                 else:
                     safe_makedirs(dst_path)
                     final_path = dst_path / name
-                    # If collision, add numeric suffix
+                    # If collision, add numeric suffix (probe by attempting the move)
                     candidate = final_path
                     idx = 1
-                    while candidate.exists():
-                        candidate = final_path.with_name(f"{final_path.stem}_dup{idx}{final_path.suffix}")
-                        idx += 1
+                    while True:
+                        try:
+                            move_no_clobber(str(src_path), str(candidate))
+                            break
+                        except FileExistsError:
+                            candidate = final_path.with_name(f"{final_path.stem}_dup{idx}{final_path.suffix}")
+                            idx += 1
                     log(f"[MOVE] deletable: {src_path} -> {candidate}")
-                    shutil.move(str(src_path), str(candidate))
 
 def rename_pair(edf_path: Path, pass_path: Path, suffix: str, dry_run: bool, log):
     """Rename EDF and EDF_PASS to include suffix (if not already present)."""
@@ -173,28 +286,27 @@ def rename_pair(edf_path: Path, pass_path: Path, suffix: str, dry_run: bool, log
         log(f"[DRY] Would rename: {pass_path.name} -> {new_pass.name}")
         return new_edf, new_pass
 
-    # If targets exist, add numeric suffix
-    def unique(p: Path) -> Path:
-        if not p.exists():
-            return p
-        base = p.stem
-        ext = p.suffix
+    # If targets exist, add numeric suffix: attempt the rename and only bump
+    # the suffix on a collision (no exists() probe per candidate)
+    def rename_unique(src: Path, p: Path) -> Path:
+        if p == src:
+            return src  # already carries the suffix
+        candidate = p
         k = 1
         while True:
-            cand = p.with_name(f"{base}_dup{k}{ext}")
-            if not cand.exists():
-                return cand
-            k += 1
-
-    final_edf = unique(new_edf)
-    final_pass = unique(new_pass)
+            try:
+                move_no_clobber(str(src), str(candidate))
+                return candidate
+            except FileExistsError:
+                candidate = p.with_name(f"{p.stem}_dup{k}{p.suffix}")
+                k += 1
 
+    final_edf = rename_unique(edf_path, new_edf)
     if final_edf != edf_path:
         log(f"[RENAME] {edf_path.name} -> {final_edf.name}")
-        edf_path.rename(final_edf)
+    final_pass = rename_unique(pass_path, new_pass)
     if final_pass != pass_path:
         log(f"[RENAME] {pass_path.name} -> {final_pass.name}")
-        pass_path.rename(final_pass)
     return final_edf, final_pass
 
 def rar_add_archive(rar_exe: Path, folder_to_archive: Path, archive_path: Path, dry_run: bool, log) -> int:
@@ -244,6 +356,13 @@ class Worker(threading.Thread):
         self.app = app
         self.items = items
         self.cancel_flag = threading.Event()
+        # Built on the Tk thread (on_run): read the Tk variables here, once,
+        # since the worker threads may not touch Tk.
+        self.dry = app.var_dry_run.get()
+        self.rar_exe = Path(app.var_rar.get())
+        self.folderA = Path(app.var_folderA.get())
+        deletable = app.var_deletable.get().strip()
+        self.deletable_root = Path(deletable) if deletable else (self.folderA / "deletable")
 
     def cancel(self):
         self.cancel_flag.set()
@@ -254,31 +373,61 @@ class Worker(threading.Thread):
     def run(self):
         total = len(self.items)
         done = 0
-        for item in self.items:
-            if self.cancel_flag.is_set():
-                self.log("[CANCEL] Run aborted by user.")
+        # Two-stage pipeline: a helper thread moves the deletables of the next
+        # subject while this thread runs rar.exe (the long step) on the
+        # current one.
+        ready = queue.Queue()
+        threading.Thread(target=self._pre_archive_stage, args=(ready,), daemon=True).start()
+        while True:
+            item = ready.get()
+            if item is None:
                 break
-            self._process_item(item)
-            done += 1
-            self.app.update_overall_progress(done, total)
-        self.app.run_finished()
-
-    def _process_item(self, t: SubjectTask):
-        app = self.app
-        dry = app.var_dry_run.get()
-        rar_exe = Path(app.var_rar.get())
-        folderA = Path(app.var_folderA.get())
-        deletable_root = Path(app.var_deletable.get()) if app.var_deletable.get().strip() else (folderA / "deletable")
-        safe_makedirs(deletable_root)
-
-        # Update row status
-        def set_status(s, d=""):
-            t.status = s
-            t.details = d
-            app.update_row(t)
+            t, pre_ok = item
+            try:
+                if self.cancel_flag.is_set():
+                    if pre_ok:
+                        self._set_status(t, "Skipped", "Pre-archived, not archived (cancelled)")
+                        self.log(f"[CANCEL] {t.subject}: deletables moved, folder not archived.")
+                    continue
+                if pre_ok:
+                    self._archive_item(t)
+                done += 1
+                self.app.post_ui(self.app.update_overall_progress, done, total)
+            finally:
+                ready.task_done()
+        if self.cancel_flag.is_set():
+            self.log("[CANCEL] Run aborted by user.")
+        self.app.post_ui(self.app.run_finished)
+
+    def _pre_archive_stage(self, ready: queue.Queue):
+        # ready.join() waits for the archiver to finish the previous subject,
+        # so at most one subject is pre-archived ahead of the one in rar.exe.
+        try:
+            for t in self.items:
+                if self.cancel_flag.is_set():
+                    break
+                pre_ok = self._pre_archive_item(t)
+                ready.join()
+                ready.put((t, pre_ok))
+        finally:
+            ready.put(None)
+
+    def _deletable_root(self) -> Path:
+        safe_makedirs(self.deletable_root)
+        return self.deletable_root
+
+    def _set_status(self, t: SubjectTask, s, d=""):
+        t.status = s
+        t.details = d
+        self.app.post_ui(self.app.update_row, t)
+
+    def _pre_archive_item(self, t: SubjectTask) -> bool:
+        """Step 1 (pre-archive stage): move deletable extensions out of the subject folder."""
+        dry = self.dry
+        deletable_root = self._deletable_root()
 
         self.log(f"--- Processing: {t.subject} ---")
-        set_status("Running", "Starting...")
+        self._set_status(t, "Running", "Starting...")
 
         # 1) Pre-archive: move deletable extensions
         pre_dst = deletable_root / t.subject / "pre_archive"
@@ -286,16 +435,23 @@ class Worker(threading.Thread):
         try:
             move_selected_extensions(t.subj_folder, DELETABLE_EXTENSIONS, pre_dst, dry, self.log)
         except Exception as e:
-            set_status("Failed", f"Move deletables error: {e}")
+            self._set_status(t, "Failed", f"Move deletables error: {e}")
             self.log(f"[ERROR] move deletables: {e}")
-            return
+            return False
+        return True
+
+    def _archive_item(self, t: SubjectTask):
+        """Steps 2-5 (archive stage): RAR add + test, move the rest, rename."""
+        dry = self.dry
+        rar_exe = self.rar_exe
+        deletable_root = self._deletable_root()
 
         # 2) Archive remaining subject folder
-        archive_path = Path(app.var_folderA.get()) / f"{t.subject}.rar"
+        archive_path = self.folderA / f"{t.subject}.rar"
         self.log(f"[STEP] Archiving folder to: {archive_path}")
         rc = rar_add_archive(rar_exe, t.subj_folder, archive_path, dry, self.log)
         if rc != 0:
-            set_status("Failed", f"RAR add rc={rc}")
+            self._set_status(t, "Failed", f"RAR add rc={rc}")
             self.log(f"[ERROR] RAR add failed rc={rc}")
             return
 
@@ -303,7 +459,7 @@ class Worker(threading.Thread):
         self.log(f"[STEP] Testing archive: {archive_path}")
         rc = rar_test_archive(rar_exe, archive_path, dry, self.log)
         if rc != 0:
-            set_status("Failed", f"RAR test rc={rc}")
+            self._set_status(t, "Failed", f"RAR test rc={rc}")
             self.log(f"[ERROR] RAR test failed rc={rc}")
             return
 
@@ -311,12 +467,12 @@ class Worker(threading.Thread):
         post_dst = deletable_root / t.subject / "post_archive"
         self.log(f"[STEP] Moving remaining subject folder to: {post_dst}")
         try:
-            if t.subj_folder.exists() and any(t.subj_folder.iterdir()):
+            if dir_is_nonempty(t.subj_folder):
                 move_tree(t.subj_folder, post_dst, dry, self.log)
             else:
                 self.log("[INFO] Subject folder already empty.")
         except Exception as e:
-            set_status("Failed", f"Move post-archive error: {e}")
+            self._set_status(t, "Failed", f"Move post-archive error: {e}")
             self.log(f"[ERROR] move post-archive: {e}")
             return
 
@@ -325,11 +481,11 @@ class Worker(threading.Thread):
         try:
             rename_pair(t.edf, t.edf_pass, RENAME_SUFFIX, dry, self.log)
         except Exception as e:
-            set_status("Failed", f"Rename error: {e}")
+            self._set_status(t, "Failed", f"Rename error: {e}")
             self.log(f"[ERROR] rename: {e}")
             return
 
-        set_status("OK", "Completed.")
+        self._set_status(t, "OK", "Completed.")
         self.log(f"--- Done: {t.subject} ---\n")
 
 # -------------------------
@@ -350,44 +506,155 @@ class App(tk.Tk):
         self.var_deletable = tk.StringVar(value="")  # empty means use FolderA\deletable
         self.var_dry_run = tk.BooleanVar(value=True)
 
-        # Logging
+        # Logging; ui_q carries widget updates from the worker threads and is
+        # drained on the same Tk tick
         self.log_q = queue.Queue()
+        self.ui_q = queue.Queue()
         self.after(100, self._drain_log_queue)
         self.run_log_file = None
         self._open_run_log()
 
+        # Subject folder sizes: path -> (folder mtime, size in bytes). Filled
+        # from the scan pool threads, saved/cleared from the Tk thread.
+        self._size_lock = threading.Lock()
+        self._size_cache: dict[str, tuple[float, int]] = self._load_size_cache()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # UI
         self._build_ui()
 
         # Data
         self.tasks: list[SubjectTask] = []
         self.worker: Worker | None = None
+        self._scan_q: queue.Queue | None = None
 
     # ------- Logging ------
     def _open_run_log(self):
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         logs_dir = Path.cwd() / "logs"
         safe_makedirs(logs_dir)
+        self.logs_dir = logs_dir
         self.run_log_file = logs_dir / f"edf_cleanup_run_{ts}.log"
+        # One buffered handle for the whole session; log() flushes it every
+        # LOG_FLUSH_EVERY lines and the log-pane tick every LOG_FLUSH_SEC.
+        self._log_lock = threading.Lock()
+        self._log_pending = 0
+        self._log_flushed_at = time.monotonic()
+        try:
+            self._log_fh = self.run_log_file.open("a", encoding="utf-8", buffering=64 * 1024)
+        except Exception:
+            self._log_fh = None
+
+    def _flush_run_log(self):
+        with self._log_lock:
+            if self._log_fh is not None:
+                try:
+                    self._log_fh.flush()
+                except Exception:
+                    pass
+            self._log_pending = 0
+            self._log_flushed_at = time.monotonic()
+
+    # ------- Folder size cache ------
+    def _load_size_cache(self) -> dict:
+        try:
+            with (self.logs_dir / SIZE_CACHE_NAME).open("r", encoding="utf-8") as f:
+                return {k: (float(m), int(sz)) for k, (m, sz) in json.load(f).items()}
+        except Exception:
+            return {}
+
+    def _save_size_cache(self):
+        with self._size_lock:
+            snapshot = dict(self._size_cache)
+        try:
+            with (self.logs_dir / SIZE_CACHE_NAME).open("w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+        except Exception as e:
+            self.log(f"[WARN] could not save size cache: {e}")
+
+    def cached_folder_size(self, folder: Path) -> int:
+        """
+        folder_size_bytes(), reused while the subject folder's own mtime is
+        unchanged. Only direct children bump that mtime, so use Clear cache
+        after editing files deeper in a subject tree.
+        """
+        key = str(folder)
+        mtime = folder.stat().st_mtime
+        with self._size_lock:
+            hit = self._size_cache.get(key)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+        size = folder_size_bytes(folder)
+        with self._size_lock:
+            self._size_cache[key] = (mtime, size)
+        return size
+
+    def on_clear_cache(self):
+        with self._size_lock:
+            self._size_cache.clear()
+        self._save_size_cache()
+        self.log("[INFO] Folder size cache cleared.")
+
+    def _on_close(self):
+        self._save_size_cache()
+        with self._log_lock:
+            if self._log_fh is not None:
+                try:
+                    self._log_fh.close()
+                except Exception:
+                    pass
+                self._log_fh = None
+        self.destroy()
 
     def log(self, msg: str):
         line = f"[{datetime.now().strftime('%H:%M:%S')}] {msg}"
         self.log_q.put(line)
-        try:
-            with self.run_log_file.open("a", encoding="utf-8") as f:
-                f.write(line + "\n")
-        except Exception:
-            pass
+        # Called from the worker thread too, hence the lock
+        with self._log_lock:
+            if self._log_fh is None:
+                return
+            try:
+                self._log_fh.write(line + "\n")
+                self._log_pending += 1
+                if self._log_pending >= LOG_FLUSH_EVERY:
+                    self._log_fh.flush()
+                    self._log_pending = 0
+                    self._log_flushed_at = time.monotonic()
+            except Exception:
+                pass
+
+    def _flush_run_log_if_due(self):
+        # Time-based flush runs from the Tk tick, so lines logged just before
+        # a long rar run reach the file even if nothing else is logged.
+        with self._log_lock:
+            if not self._log_pending or time.monotonic() - self._log_flushed_at < LOG_FLUSH_SEC:
+                return
+        self._flush_run_log()
+
+    def post_ui(self, fn, *args):
+        """Run fn(*args) on the Tk thread at the next log-pane tick."""
+        self.ui_q.put((fn, args))
 
     def _drain_log_queue(self):
+        # Worker threads may not touch Tk, so the main loop polls; take every
+        # queued line per tick and insert them as one block (one reflow).
+        lines = []
         try:
             while True:
-                line = self.log_q.get_nowait()
-                self.txt_log.insert(tk.END, line + "\n")
-                self.txt_log.see(tk.END)
+                lines.append(self.log_q.get_nowait())
         except queue.Empty:
             pass
-        self.after(100, self._drain_log_queue)
+        if lines:
+            self.txt_log.insert(tk.END, "\n".join(lines) + "\n")
+            self.txt_log.see(tk.END)
+        try:
+            while True:
+                fn, args = self.ui_q.get_nowait()
+                fn(*args)
+        except queue.Empty:
+            pass
+        self._flush_run_log_if_due()
+        self.after(LOG_POLL_BUSY_MS if lines else LOG_POLL_IDLE_MS, self._drain_log_queue)
 
     # ------- UI Build -----
     def _build_ui(self):
@@ -426,11 +693,13 @@ class App(tk.Tk):
         # Middle: actions
         act = ttk.Frame(self)
         act.pack(side=tk.TOP, fill=tk.X, padx=10, pady=6)
-        ttk.Button(act, text="Scan", command=self.on_scan).pack(side=tk.LEFT, padx=4)
+        self.btn_scan = ttk.Button(act, text="Scan", command=self.on_scan)
+        self.btn_scan.pack(side=tk.LEFT, padx=4)
         self.btn_run = ttk.Button(act, text="Run", command=self.on_run, state=tk.DISABLED)
         self.btn_run.pack(side=tk.LEFT, padx=4)
         self.btn_cancel = ttk.Button(act, text="Cancel", command=self.on_cancel, state=tk.DISABLED)
         self.btn_cancel.pack(side=tk.LEFT, padx=4)
+        ttk.Button(act, text="Clear cache", command=self.on_clear_cache).pack(side=tk.LEFT, padx=4)
 
         # Progress bars
         pfrm = ttk.Frame(self)
@@ -509,46 +778,92 @@ class App(tk.Tk):
             self.tv.delete(row)
 
         # Build set of available subject folders in A for exact match
-        subjectsA = {p.name: p for p in folderA.iterdir() if p.is_dir()}
-
-        # Scan EDFs in B
-        edf_files = sorted(folderB.glob("*.edf"))
-        count_candidates = 0
-        for edf in edf_files:
-            subj = edf.stem
-            edf_pass = edf.with_suffix(edf.suffix + "_pass")  # "<name>.edf_pass"
-            edf_fail = edf.with_suffix(edf.suffix + "_fail")  # "<name>.edf_fail"
+        # (scandir: is_dir() answers from the listing, no stat per entry)
+        with os.scandir(folderA) as it:
+            subjectsA = {e.name: e.path for e in it if e.is_dir()}
+
+        # Scan EDFs in B: one listing answers the .edf_pass/.edf_fail checks
+        # and (on Windows, from the listing data) the EDF sizes
+        with os.scandir(folderB) as it:
+            entriesB = sorted(it, key=lambda e: e.name)
+        namesB = {os.path.normcase(e.name) for e in entriesB}
+        candidates = []
+        # Plain strings in the loop; Path objects only for real candidates
+        for entry in entriesB:
+            name = entry.name
+            if not os.path.normcase(name).endswith(".edf"):
+                continue
+            subj = name[:-4]
+            pass_name = name + "_pass"  # "<name>.edf_pass"
 
             # criteria: pass exists, fail absent
-            if not edf_pass.exists():
+            if os.path.normcase(pass_name) not in namesB:
                 continue
-            if edf_fail.exists():
-                self.log(f"[SKIP] {edf.name}: found .edf_fail")
+            if os.path.normcase(name + "_fail") in namesB:
+                self.log(f"[SKIP] {name}: found .edf_fail")
                 continue
             # exact match subject folder
             subj_folder = subjectsA.get(subj)
             if subj_folder is None:
-                self.log(f"[SKIP] {edf.name}: no exact folder match in Folder A")
+                self.log(f"[SKIP] {name}: no exact folder match in Folder A")
                 continue
 
-            t = SubjectTask(subj, edf, edf_pass, subj_folder)
-            # Size constraint: EDF >= folder size
+            t = SubjectTask(subj, Path(entry.path), folderB / pass_name, Path(subj_folder))
             try:
-                t.edf_size = edf.stat().st_size
-                t.folder_size = folder_size_bytes(subj_folder)
-                t.size_ok = "True" #(t.edf_size >= t.folder_size)
-            except Exception:
-                t.size_ok = False
+                t.edf_size = entry.stat().st_size
+            except OSError:
+                t.edf_size = None
+            candidates.append(t)
+
+        # Folder walks run on a thread pool; rows arrive through _scan_q so the
+        # UI stays responsive and only the Tk thread touches widgets.
+        self.btn_scan.config(state=tk.DISABLED)
+        self.btn_run.config(state=tk.DISABLED)
+        self._scan_q = queue.Queue()
+        threading.Thread(target=self._measure_sizes, args=(candidates, self._scan_q), daemon=True).start()
+        self.after(50, self._drain_scan_queue)
+
+    def _measure_task(self, t: SubjectTask) -> SubjectTask:
+        # Size constraint: EDF >= folder size (edf_size is None if its stat failed)
+        if t.edf_size is None:
+            t.edf_size = 0
+            t.size_ok = False
+            return t
+        try:
+            t.folder_size = self.cached_folder_size(t.subj_folder)
+            t.size_ok = "True" #(t.edf_size >= t.folder_size)
+        except Exception:
+            t.size_ok = False
+        return t
 
-            if not t.size_ok:
-                self.log(f"[SKIP] {edf.name}: size check failed (EDF {human_bytes(t.edf_size)} < folder {human_bytes(t.folder_size)})")
-                #continue
+    def _measure_sizes(self, candidates, q: queue.Queue):
+        """Background thread: measure all candidates, posting them in scan order."""
+        try:
+            with ThreadPoolExecutor(max_workers=SIZE_SCAN_WORKERS) as pool:
+                for t in pool.map(self._measure_task, candidates):
+                    q.put(t)
+        finally:
+            q.put(None)
 
-            self.tasks.append(t)
-            count_candidates += 1
-            self._insert_row(t)
+    def _drain_scan_queue(self):
+        try:
+            while True:
+                t = self._scan_q.get_nowait()
+                if t is None:
+                    self._scan_finished()
+                    return
+                if not t.size_ok:
+                    self.log(f"[SKIP] {t.edf.name}: size check failed (EDF {human_bytes(t.edf_size)} < folder {human_bytes(t.folder_size)})")
+                    #continue
+                self.tasks.append(t)
+                self._insert_row(t)
+        except queue.Empty:
+            pass
+        self.after(50, self._drain_scan_queue)
 
-        self.log(f"=== SCAN DONE: {count_candidates} candidate(s) ===")
+    def _scan_finished(self):
+        self.log(f"=== SCAN DONE: {len(self.tasks)} candidate(s) ===")
+        self.btn_scan.config(state=tk.NORMAL)
         self.btn_run.config(state=(tk.NORMAL if self.tasks else tk.DISABLED))
         self.update_overall_progress(0, max(1, len(self.tasks)))
 
@@ -609,6 +924,7 @@ class App(tk.Tk):
         self.pb_item["value"] = 0
         self.update_idletasks()
         self.log("=== RUN FINISHED ===")
+        self._flush_run_log()
 
 # -------------------------
 # Main
@@ -14,14 +14,21 @@ except:
 
 required_extensions = ['.rar', '.edf']
 
-def folder_contains_all_extensions(folder_path, extensions):
+def folder_contains_all_extensions(folder_path, extensions, names=None):
+    # `names`: file names already listed by the caller (os.walk), so the
+    # folder is not listed a second time.
+    low_exts = [ext.lower() for ext in extensions]
     found_extensions = set()
     print(f"Checking {folder_path}")
-    for file in os.listdir(folder_path):
-        for ext in extensions:
-            low_ext = ext.lower()
-            if file.lower().endswith(low_ext):
+    if names is None:
+        names = os.listdir(folder_path)
+    for file in names:
+        low_file = file.lower()
+        for low_ext in low_exts:
+            if low_file.endswith(low_ext):
                 found_extensions.add(low_ext)
+                if len(found_extensions) == len(extensions):
+                    return True
                 break
     return len(found_extensions) == len(extensions)
 
@@ -29,7 +36,7 @@ def search_folders_with_extensions(directory, extensions):
     matching_folders = []
     for root, dirs, files in os.walk(directory):
         print(f"Checking {root}")
-        if folder_contains_all_extensions(root, extensions):
+        if folder_contains_all_extensions(root, extensions, files):
             matching_folders.append(root)
             print(f"Found all extensions in {root}, validating...")
             rar_checksum_eval(root, tmp_dir=cur_path)
@@ -8,6 +8,9 @@ import argparse
 from pathlib import Path
 from tqdm import tqdm
 
+# Configuration
+RAR_EXE = r"C:\Program Files\WinRAR\rar.exe"  # console rar, not the WinRAR GUI
+
 def setup_logger(log_file_path):
     log_file_path.parent.mkdir(parents=True, exist_ok=True)
     logger = logging.getLogger("verify_and_archive")
@@ -30,23 +33,65 @@ def setup_logger(log_file_path):
 
     return logger
 
-def folder_size(path):
+def _iter_file_sizes(path):
+    """Yield the size of every file under path (os.walk coverage)."""
+    # POSIX: fwalk keeps a dirfd open, so each file is an openat-relative
+    # fstatat with no full-path resolution.
+    if hasattr(os, "fwalk"):
+        walker = os.fwalk(path)
+        try:
+            for _, _, filenames, dirfd in walker:
+                for f in filenames:
+                    yield os.stat(f, dir_fd=dirfd).st_size
+        finally:
+            walker.close()
+        return
+
+    # Windows: scandir walk; DirEntry.stat() reuses the directory listing
+    # data, so each file costs no extra syscall.
+    stack = [os.fspath(path)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        stack.append(entry.path)
+                else:
+                    yield entry.stat().st_size
+
+def folder_size_at_least(path, limit):
+    """
+    Returns (exceeded, total). Stops walking as soon as total > limit, so
+    total is only exact when exceeded is False.
+    """
     total = 0
-    for dirpath, _, filenames in os.walk(path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            total += os.path.getsize(fp)
-    return total
+    sizes = _iter_file_sizes(path)
+    try:
+        for size in sizes:
+            total += size
+            if total > limit:
+                return True, total
+    finally:
+        sizes.close()
+    return False, total
 
 def move_files_to_parent_deletable(folder_path, deletable_root, extensions, logger, dry_run):
     subfolder_name = Path(folder_path).name
     deletable_target = Path(deletable_root) / "deletable" / subfolder_name
     deletable_target.mkdir(parents=True, exist_ok=True)
 
+    # One C-level endswith over a tuple, lowering only the tail that can match
+    exts = tuple(ext.lower() for ext in extensions)
+    tail = max((len(ext) for ext in exts), default=0)
+
     logger.info(f"Moving deletable files from {folder_path} to {deletable_target}")
     for root, _, files in os.walk(folder_path):
         for file in files:
-            if any(file.lower().endswith(ext) for ext in extensions):
+            if file[-tail:].lower().endswith(exts):
                 source_path = Path(root) / file
                 destination_path = deletable_target / file
                 if dry_run:
@@ -59,22 +104,25 @@ def move_files_to_parent_deletable(folder_path, deletable_root, extensions, logg
                         logger.error(f"Failed to move {source_path}: {e}")
 
 def rar_compress(folder_path, output_rar, logger, dry_run):
-    winrar_exe = r'"C:\Program Files\WinRAR\WinRAR.exe"'  # quoted for safety
-    cmd = (
-        f'start /min "" {winrar_exe} a -m3 -md1g -s -rr5% -df -t '
-        f'"{output_rar}" "{folder_path}"'
-    )
+    """Compress (and test, -t) folder_path into output_rar. Returns True on success."""
+    threads = min(os.cpu_count() or 1, 64)
+    cmd = [RAR_EXE, "a", "-m3", f"-mt{threads}", "-md1g", "-s", "-rr5%", "-df", "-t",
+           output_rar, folder_path]
 
     if dry_run:
-        logger.info(f"[Dry Run] Would run: {cmd}")
-        return
+        logger.info(f"[Dry Run] Would run: {subprocess.list2cmdline(cmd)}")
+        return True
 
-    logger.info(f"Running RAR compression: {cmd}")
+    logger.info(f"Running RAR compression: {subprocess.list2cmdline(cmd)}")
+    # CREATE_NO_WINDOW: blocking console run, no window, real exit code
+    creationflags = 0x08000000 if os.name == "nt" else 0
     try:
-        subprocess.run(cmd, shell=True)
-        logger.info(f"RAR archive started: {output_rar}")
-    except subprocess.CalledProcessError as e:
+        subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL, creationflags=creationflags)
+        logger.info(f"RAR archive created: {output_rar}")
+        return True
+    except (subprocess.CalledProcessError, OSError) as e:
         logger.error(f"RAR compression failed for {folder_path}: {e}")
+        return False
 
 
 def rename_file_with_suffix(file_path, suffix, logger, dry_run):
@@ -96,34 +144,46 @@ def main(folder_b, folder_a, dry_run):
     log_file = folder_b / "verification_archive.log"
     logger = setup_logger(log_file)
 
-    edf_files = list(folder_b.glob("*.edf"))
-    logger.info(f"Found {len(edf_files)} EDF files to process")
-
-    for edf_file in tqdm(edf_files, desc="Processing EDFs", unit="file"):
+    # One listing of Folder B gives the EDFs, their sizes (from the listing
+    # data on Windows) and every .edf_pass check
+    with os.scandir(folder_b) as it:
+        entries_b = list(it)
+    names_b = {os.path.normcase(e.name) for e in entries_b}
+    edf_entries = [e for e in entries_b if os.path.normcase(e.name).endswith(".edf")]
+    # One listing of Folder A instead of an is_dir() stat per EDF
+    with os.scandir(folder_a) as it:
+        subject_dirs = {os.path.normcase(e.name) for e in it if e.is_dir()}
+    logger.info(f"Found {len(edf_entries)} EDF files to process")
+
+    for edf_entry in tqdm(edf_entries, desc="Processing EDFs", unit="file"):
+        edf_file = Path(edf_entry.path)
         base_name = edf_file.stem
         logger.info(f"\n---\nProcessing {edf_file.name}")
 
         corresponding_folder = folder_a / base_name
         edf_pass_file = folder_b / f"{base_name}.edf_pass"
 
-        if not corresponding_folder.is_dir():
+        if os.path.normcase(base_name) not in subject_dirs:
             logger.info(f"Folder not found: {corresponding_folder}, skipping.")
             continue
 
-        if not edf_pass_file.exists():
+        if os.path.normcase(edf_pass_file.name) not in names_b:
             logger.info(f"edf_pass file not found for {edf_file.name}, skipping.")
             continue
 
-        edf_size = edf_file.stat().st_size
-        folder_size_bytes = folder_size(corresponding_folder)
+        edf_size = edf_entry.stat().st_size
+        # Only "folder larger than EDF?" matters: stop walking once it is
+        folder_too_big, _ = folder_size_at_least(corresponding_folder, edf_size)
 
-        if edf_size < folder_size_bytes:
+        if folder_too_big:
             logger.info(f"{edf_file.name} is smaller than folder size, skipping.")
             continue
 
         move_files_to_parent_deletable(corresponding_folder, folder_a, [".avi", ".erd"], logger, dry_run)
         rar_output = folder_a / f"{base_name}.rar"
-        rar_compress(str(corresponding_folder), str(rar_output), logger, dry_run)
+        if not rar_compress(str(corresponding_folder), str(rar_output), logger, dry_run):
+            logger.info(f"Leaving {edf_file.name} unrenamed because archiving failed.")
+            continue
 
         rename_file_with_suffix(edf_file, "verified_stpAcln", logger, dry_run)
         rename_file_with_suffix(edf_pass_file, "verified_stpAcln", logger, dry_run)
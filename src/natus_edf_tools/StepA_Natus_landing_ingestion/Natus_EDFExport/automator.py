@@ -4,10 +4,17 @@ import shutil
 import subprocess
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-replication_issue_flag = threading.Event()
-
+# Optional: Windows change notifications for wait_for_folder_release
+try:
+    import win32con
+    import win32event
+    import win32file
+    HAVE_WIN32 = True
+except ImportError:
+    HAVE_WIN32 = False
 
 # Configuration
 MAIN_FOLDER = r'y:\_pipeline_phis\_StepA_AutoFLD_NatusInp'
@@ -17,6 +24,11 @@ EDFEXPORT_PATH = r'd:\Neuroworks\EDFExport.exe'
 EDFTEMPLATE_PATH = r'd:\Neuroworks\Settings\quant_new_256_with_photic.exp'
 PROCESSED_LIST_FILE = r'x:\_pipeline_phis\stepA_processed_list.txt'
 CHECK_INTERVAL = 10  # in seconds
+CONVERSION_WORKERS = int(os.environ.get("STEPA_WORKERS", "4"))  # concurrent EDFExport runs (each one mostly waits on I/O)
+WATCH_RESCAN_INTERVAL = 300  # safety rescan (seconds) when MAIN_FOLDER change notifications are available
+
+UUID_RE = re.compile(r'([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})', re.IGNORECASE)
+HEX_CHARS = frozenset('0123456789abcdefABCDEF')
 
 # Sub-folders under ARCHIVE_FOLDER
 SKIP_DIR = os.path.join(ARCHIVE_FOLDER, 'skipped sessions')
@@ -39,55 +51,162 @@ def kill_edfexport_processes(target_cmdline_fragment=None):
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             pass
 
-def wait_for_folder_release(folder_path, timeout=60):
+def process_tree_write_bytes(pid):
     """
-    Wait up to `timeout` seconds for the folder to be released (e.g. by EDFExport.exe).
-    Returns True if the folder becomes available, False if not.
+    Total bytes written by `pid` and its children (EDFExport runs under
+    cmd.exe because of shell=True). None if the process is gone.
     """
-    start = time.time()
-    probe = os.path.join(folder_path, '__probe__.tmp')
-    while time.time() - start < timeout:
+    try:
+        parent = psutil.Process(pid)
+        procs = [parent] + parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return None
+    total = 0
+    for p in procs:
         try:
-            with open(probe, 'w') as f:
-                f.write('probe')
-            os.remove(probe)
-            return True
-        except Exception:
-            time.sleep(1)
-    return False
+            total += p.io_counters().write_bytes
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total
 
+def open_change_notification(folder_path, notify_filter):
+    """Return a Win32 change-notification handle for folder_path, or None."""
+    if not HAVE_WIN32:
+        return None
+    try:
+        return win32file.FindFirstChangeNotification(folder_path, False, notify_filter)
+    except Exception:
+        return None
+
+def is_remote_path(folder_path):
+    """True for UNC paths and mapped network drives (change notifications are unreliable there)."""
+    if folder_path.startswith('\\\\'):
+        return True
+    if not HAVE_WIN32:
+        return False
+    drive = os.path.splitdrive(os.path.abspath(folder_path))[0]
+    try:
+        return win32file.GetDriveType(drive + '\\') == win32con.DRIVE_REMOTE
+    except Exception:
+        return True
+
+def is_folder_writable(folder_path):
+    """Single create+delete probe; True if the folder accepts new files."""
+    probe = os.path.join(folder_path, '__probe__.tmp')
+    try:
+        fd = os.open(probe, os.O_CREAT | os.O_WRONLY | os.O_TRUNC)
+        os.close(fd)
+        os.remove(probe)
+        return True
+    except Exception:
+        return False
+
+def wait_for_folder_release(folder_path, timeout=60, recheck_sec=5):
+    """
+    Wait up to `timeout` seconds for the folder to be released (e.g. by EDFExport.exe).
+    Returns True if the folder becomes available, False if not.
 
-def detect_replication_issue(base_name, stop_event):
-    pattern = re.compile(r'.*' + re.escape(base_name) + r'\(\d+\)\.edf$', re.IGNORECASE)
-    while not stop_event.is_set():
-        print(f"[Monitor] Checking for replication of '{base_name}'", flush=True)
-        for fname in os.listdir(DEST_FOLDER):
-            if pattern.match(fname):
-                replication_issue_flag.set()
-                print(f"[Monitor] Replication issue detected: '{fname}'", flush=True)
-                return
-        time.sleep(10)
+    On Windows (pywin32 installed) this blocks on a directory change
+    notification and probes as soon as something changes. A release does not
+    always touch the directory, so it still re-probes every `recheck_sec`.
+    Elsewhere it falls back to probing once per second.
+    """
+    deadline = time.time() + timeout
+    if is_folder_writable(folder_path):
+        return True
+
+    handle = None
+    if HAVE_WIN32:
+        handle = open_change_notification(
+            folder_path,
+            win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE)
+
+    if handle is None:
+        while time.time() < deadline:
+            time.sleep(1)
+            if is_folder_writable(folder_path):
+                return True
+        return False
 
+    try:
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            rc = win32event.WaitForSingleObject(handle, int(min(remaining, recheck_sec) * 1000))
+            if is_folder_writable(folder_path):
+                return True
+            if rc == win32event.WAIT_OBJECT_0:
+                win32file.FindNextChangeNotification(handle)
+    finally:
+        win32file.FindCloseChangeNotification(handle)
 
 
-def monitor_output_file(file_path, proc, folder_name, timeout_mb_per_min=10, check_interval_sec=15):
+def is_replica_name(name, base_lower):
+    """
+    True for '<...><base>(<digits>).edf' (case-insensitive): the copy names
+    EDFExport produces when it replicates an export. Plain string tests, no
+    regex scan of every DEST_FOLDER entry.
+    """
+    lower = name.lower()
+    if not lower.endswith(').edf'):
+        return False
+    i = lower.rfind('(', 0, -5)
+    return i != -1 and lower[i + 1:-5].isdigit() and lower.endswith(base_lower, 0, i)
+
+def detect_replication_issue(base_name, stop_event, issue_flag, interval_sec=10):
+    base_lower = base_name.lower()
+    # Only name changes matter here; the export itself rewrites its EDF constantly.
+    handle = None
+    if HAVE_WIN32:
+        handle = open_change_notification(DEST_FOLDER, win32con.FILE_NOTIFY_CHANGE_FILE_NAME)
+    try:
+        while not stop_event.is_set():
+            print(f"[Monitor] Checking for replication of '{base_name}'", flush=True)
+            with os.scandir(DEST_FOLDER) as it:
+                for entry in it:
+                    if is_replica_name(entry.name, base_lower):
+                        issue_flag.set()
+                        print(f"[Monitor] Replication issue detected: '{entry.name}'", flush=True)
+                        return
+            if handle is None:
+                stop_event.wait(interval_sec)
+            elif win32event.WaitForSingleObject(handle, interval_sec * 1000) == win32event.WAIT_OBJECT_0:
+                win32file.FindNextChangeNotification(handle)
+    finally:
+        if handle is not None:
+            win32file.FindCloseChangeNotification(handle)
+
+
+
+def monitor_output_file(file_path, proc, folder_name, issue_flag, timeout_mb_per_min=10, check_interval_sec=15):
     prev_size = 0
     stagnant_time = 0  # seconds of low activity
     threshold_bytes = timeout_mb_per_min * 1024 * 1024 / 60 * check_interval_sec
+    # Kernel I/O counters where psutil supports them (Windows/Linux): no stat
+    # of the output file on the share for every poll.
+    use_io_counters = hasattr(psutil.Process, "io_counters")
 
     while proc.poll() is None:  # while still running
         time.sleep(check_interval_sec)
 
         # Stop immediately if replication is detected
-        if replication_issue_flag.is_set():
+        if issue_flag.is_set():
             print("[Monitor] Replication flag detected inside monitor - terminating process.", flush=True)
             kill_edfexport_processes(target_cmdline_fragment=folder_name)
             return False
 
-        if not os.path.exists(file_path):
-            continue
-        new_size = os.path.getsize(file_path)
-        delta = new_size - prev_size
+        if use_io_counters:
+            new_size = process_tree_write_bytes(proc.pid)
+            if new_size is None:
+                continue
+        else:
+            try:
+                new_size = os.stat(file_path).st_size
+            except FileNotFoundError:
+                continue
+        # Counters of a child that exited drop out of the sum; never go negative
+        delta = max(0, new_size - prev_size)
         prev_size = new_size
 
         if delta < threshold_bytes:
@@ -116,17 +235,47 @@ def read_processed_list():
     with open(PROCESSED_LIST_FILE, 'r') as f:
         return set(line.strip() for line in f if line.strip())
 
+# In-memory mirror of PROCESSED_LIST_FILE; kept in sync by
+# append_to_processed_list and reloaded by refresh_processed_list only when
+# the file changes underneath us (e.g. an operator removes a line).
+processed_folders = set()
+_processed_mtime = None
+_processed_lock = threading.Lock()  # conversions run on a thread pool
+
+def _processed_list_mtime():
+    try:
+        return os.stat(PROCESSED_LIST_FILE).st_mtime
+    except FileNotFoundError:
+        return None
+
+def refresh_processed_list():
+    global _processed_mtime
+    mtime = _processed_list_mtime()
+    if mtime == _processed_mtime:
+        return
+    with _processed_lock:
+        processed_folders.clear()
+        processed_folders.update(read_processed_list())
+        _processed_mtime = mtime
+
 def append_to_processed_list(folder_name):
-    with open(PROCESSED_LIST_FILE, 'a') as f:
-        f.write(f"{folder_name}\n")
+    global _processed_mtime
+    with _processed_lock:
+        with open(PROCESSED_LIST_FILE, 'a') as f:
+            f.write(f"{folder_name}\n")
+        processed_folders.add(folder_name)
+        # Our own append must not trigger a reload on the next pass
+        _processed_mtime = _processed_list_mtime()
 
 def log_provenance(log_path, start_time, end_time, source_folder, edf_match, folder_name):
     with open(log_path, 'w') as f:
-        f.write(f"Task started:   {start_time}\n")
-        f.write(f"Task ended:     {end_time}\n")
-        f.write(f"Source folder:  {source_folder}\n")
-        f.write(f"EDF matched:    {edf_match}\n")
-        f.write(f"Folder name:    {folder_name}\n")
+        f.write(
+            f"Task started:   {start_time}\n"
+            f"Task ended:     {end_time}\n"
+            f"Source folder:  {source_folder}\n"
+            f"EDF matched:    {edf_match}\n"
+            f"Folder name:    {folder_name}\n"
+        )
 
 def base_from_folder(folder_name):
     """
@@ -134,14 +283,57 @@ def base_from_folder(folder_name):
     Example: sub-080_X~ X_1d395e3c-11ea-4b8f-ba48-3b8dc56c8151
     ? 1d395e3c-11ea-4b8f-ba48-3b8dc56c8151
     """
-    match = re.search(r'([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})', folder_name, re.IGNORECASE)
+    # Fast path: Natus folders end in "_<uuid>", so check the last segment
+    # without running the regex.
+    tail = folder_name.rsplit('_', 1)[-1]
+    if (len(tail) == 36 and tail[8] == tail[13] == tail[18] == tail[23] == '-'
+            and HEX_CHARS.issuperset(tail.replace('-', ''))):
+        return tail
+    match = UUID_RE.search(folder_name)
     return match.group(1) if match else folder_name  # fallback to full name
 
-def find_matching_edf(uuid_part):
-    for fname in os.listdir(DEST_FOLDER):
-        if fname.lower().endswith('.edf') and uuid_part.lower() in fname.lower():
-
-            return fname
+def build_edf_index():
+    """
+    Snapshot DEST_FOLDER once: lowercased UUID (or lowercased name when the
+    file has no UUID) -> EDF file name.
+    """
+    index = {}
+    with os.scandir(DEST_FOLDER) as it:
+        for entry in it:
+            name_lower = entry.name.lower()
+            if not name_lower.endswith('.edf'):
+                continue
+            m = UUID_RE.search(name_lower)
+            index.setdefault(m.group(1) if m else name_lower, entry.name)
+    return index
+
+_dest_index = {}
+_dest_mtime_ns = None
+
+def get_edf_index():
+    """build_edf_index(), re-listed only when DEST_FOLDER's mtime changes."""
+    global _dest_index, _dest_mtime_ns
+    mtime_ns = os.stat(DEST_FOLDER).st_mtime_ns
+    if mtime_ns != _dest_mtime_ns:
+        _dest_index = build_edf_index()
+        _dest_mtime_ns = mtime_ns
+    return _dest_index
+
+def find_matching_edf(uuid_part, edf_index=None):
+    """
+    Find an EDF in DEST_FOLDER whose name contains uuid_part.
+    Pass a build_edf_index() snapshot to avoid re-listing DEST_FOLDER.
+    """
+    if edf_index is None:
+        edf_index = build_edf_index()
+    key = uuid_part.lower()
+    hit = edf_index.get(key)
+    if hit or UUID_RE.fullmatch(key):
+        return hit
+    # Non-UUID base (folder name fallback): plain substring search
+    for name in edf_index.values():
+        if key in name.lower():
+            return name
     return None
 
 
@@ -150,22 +342,28 @@ def archive_folder(src_path, dest_root, folder_name):
     dest = os.path.join(dest_root, folder_name)
     os.makedirs(os.path.dirname(dest), exist_ok=True)
     try:
-        shutil.move(src_path, dest)
+        # Same-volume rename first; shutil.move (copy + delete) only when
+        # that fails, e.g. across devices or when dest already exists.
+        try:
+            if os.path.exists(dest):
+                raise FileExistsError(dest)
+            os.replace(src_path, dest)
+        except OSError:
+            shutil.move(src_path, dest)
     except Exception:
         # if move fails, create an empty dir so user can see it
         os.makedirs(dest, exist_ok=True)
     return dest
 
-def run_conversion(folder_name, processed):
-    if folder_name in processed:
+def run_conversion(folder_name, edf_index=None):
+    """Convert one MAIN_FOLDER sub-folder; the caller ensures it is a directory."""
+    if folder_name in processed_folders:
         return
 
     source_path = os.path.join(MAIN_FOLDER, folder_name)
-    if not os.path.isdir(source_path):
-        return
 
     base = base_from_folder(folder_name)
-    edf_match = find_matching_edf(base)
+    edf_match = find_matching_edf(base, edf_index)
 
     if edf_match:
         print(f"SKIP: Found existing EDF '{edf_match}' for '{folder_name}'")
@@ -179,11 +377,12 @@ def run_conversion(folder_name, processed):
 
     expected_edf_path = os.path.join(DEST_FOLDER, base + ".edf")
 
-    replication_issue_flag.clear()
+    # Per-conversion flag: several conversions may run at once
+    replication_issue = threading.Event()
     stop_monitor = threading.Event()
     monitor_thread = threading.Thread(
         target=detect_replication_issue,
-        args=(base, stop_monitor),
+        args=(base, stop_monitor, replication_issue),
         daemon=True
     )
 
@@ -192,12 +391,12 @@ def run_conversion(folder_name, processed):
         print(f"[Main] Monitoring base name for EDF: {base}", flush=True)
         monitor_thread.start()
 
-        completed = monitor_output_file(expected_edf_path, proc, folder_name=folder_name)
+        completed = monitor_output_file(expected_edf_path, proc, folder_name, replication_issue)
 
         stop_monitor.set()
         monitor_thread.join()
 
-        if replication_issue_flag.is_set():
+        if replication_issue.is_set():
             print(f"[Main] REPLICATION ISSUE: duplicate EDFs for '{folder_name}'")
 
             if os.path.exists(expected_edf_path):
@@ -237,6 +436,7 @@ def run_conversion(folder_name, processed):
             append_to_processed_list(folder_name)
             return
 
+        # Fresh listing: the export has just written a new file
         edf_match = find_matching_edf(base)
         if not edf_match:
             print(f"[Main] Exported but EDF file not found for '{folder_name}'")
@@ -277,11 +477,45 @@ def run_conversion(folder_name, processed):
 
 
 def main_loop():
+    # New session folders wake the loop immediately on local volumes; on
+    # network shares (or without pywin32) keep polling every CHECK_INTERVAL.
+    notify = None
+    if HAVE_WIN32 and not is_remote_path(MAIN_FOLDER):
+        notify = open_change_notification(MAIN_FOLDER, win32con.FILE_NOTIFY_CHANGE_DIR_NAME)
+    # One long-lived pool: a long export no longer holds back folders that
+    # arrive meanwhile; extra submissions wait in the executor's queue.
+    pool = ThreadPoolExecutor(max_workers=CONVERSION_WORKERS)
+    in_flight = {}  # folder name -> (base, future)
     while True:
-        processed = read_processed_list()
-        for folder in os.listdir(MAIN_FOLDER):
-            run_conversion(folder, processed)
-        time.sleep(CHECK_INTERVAL)
+        for name, (_, fut) in list(in_flight.items()):
+            if fut.done():
+                del in_flight[name]
+                if fut.exception() is not None:
+                    print(f"[ERROR] Conversion of '{name}' failed: {fut.exception()}", flush=True)
+        refresh_processed_list()
+        edf_index = get_edf_index()
+        bases = {base for base, _ in in_flight.values()}
+        with os.scandir(MAIN_FOLDER) as it:
+            for entry in it:
+                # Set lookup first: processed folders cost no stat at all
+                if entry.name in processed_folders or entry.name in in_flight:
+                    continue
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                # One folder per base at a time: a concurrent second export of
+                # the same session would collide; a later pass sees it as SKIP.
+                base = base_from_folder(entry.name)
+                if base in bases:
+                    continue
+                bases.add(base)
+                fut = pool.submit(run_conversion, entry.name, edf_index)
+                in_flight[entry.name] = (base, fut)
+
+        if notify is None:
+            time.sleep(CHECK_INTERVAL)
+        else:
+            win32event.WaitForSingleObject(notify, WATCH_RESCAN_INTERVAL * 1000)
+            win32file.FindNextChangeNotification(notify)
         print(f"Cheking MAIN_FOLDER = {MAIN_FOLDER}....")
 
 if __name__ == "__main__":
@@ -119,6 +119,7 @@ Requires: Python 3.8+ (standard library only: tkinter)
 """
 
 import os
+import re
 import sys
 import csv
 import json
@@ -129,6 +130,7 @@ import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -150,6 +152,19 @@ except Exception:
         EDF_AVAILABLE = False
         EDFreader = None
 
+# ----------------------------
+# Optional RE2 regex backend
+# ----------------------------
+# google-re2 gives linear-time matching on the (untrusted, often large)
+# decoded .eeg/.ent text. Patterns below stay within the RE2 subset and use
+# inline flags so they compile identically under either backend.
+try:
+    import re2 as peek_re
+    RE2_AVAILABLE = True
+except Exception:
+    peek_re = re
+    RE2_AVAILABLE = False
+
 # ----------------------------
 # Utilities (dates, sizes, io)
 # ----------------------------
@@ -178,6 +193,47 @@ def within_last_days(target_epoch: float, days: int) -> bool:
     cutoff = time.time() - days * 86400
     return target_epoch >= cutoff
 
+def fast_copy(src, dst):
+    """
+    copy2 replacement for multi-GB session files. On Windows the data copy is
+    left to CopyFileExW instead of shutil's chunked read/write loop; elsewhere
+    shutil.copyfile already uses the OS fast path (sendfile on Linux). Metadata
+    is then copied the same way copy2 does.
+    """
+    src, dst = os.fspath(src), os.fspath(dst)
+    if sys.platform == "win32":
+        import ctypes
+        if not ctypes.windll.kernel32.CopyFileExW(src, dst, None, None, None, 0):
+            raise ctypes.WinError()
+    else:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+COPY_THREADS = 8  # concurrent file copies per session folder
+
+def copytree_parallel(src, dst, max_workers=COPY_THREADS, stop_event=None):
+    """
+    shutil.copytree with the per-file copies spread over a thread pool.
+    copytree only builds the directory skeleton; files are queued and copied
+    concurrently with fast_copy. Setting stop_event cancels queued copies.
+    """
+    jobs = []
+    shutil.copytree(src, dst, copy_function=lambda s, d: jobs.append((s, d)))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(fast_copy, s, d) for s, d in jobs]
+        for fut in as_completed(futures):
+            if stop_event is not None and stop_event.is_set():
+                for f in futures:
+                    f.cancel()
+                break
+            fut.result()
+    # copytree stamped the directories before the files landed in them;
+    # restore their times bottom-up so a parent is not touched afterwards.
+    for root, _dirs, _files in os.walk(dst, topdown=False):
+        shutil.copystat(os.path.join(src, os.path.relpath(root, dst)), root)
+    return dst
+
 # -----------------------------------------
 # Quick metadata extraction from .eeg/.ent
 # -----------------------------------------
@@ -185,6 +241,21 @@ def within_last_days(target_epoch: float, days: int) -> bool:
 EXCEL_EPOCH = datetime(1899, 12, 30)
 BINARY_HEADER_SIZE = 361  # typical small binary header
 
+# Quoted string fields read by the quick peek, compiled once at import.
+SIMPLE_FIELDS_RE = tuple(
+    (key, peek_re.compile(r'\(\."' + key + r'",\s*"([^"]+)"\)'))
+    for key in ("StudyName", "EegNo", "Machine")
+)
+
+# Candidate labels in priority order; the first label found wins.
+START_TIME_LABELS = ("RECORDINGSTARTTIME", "StartTime", "Start_Time", "RecStart")
+END_TIME_LABELS = ("RECORDINGENDTIME", "EndTime", "End_Time", "RecEnd")
+# One alternation over every label, so the text is scanned once instead of
+# once per label.
+TIMES_RE = peek_re.compile(
+    r'(?i)"(?P<label>' + "|".join(START_TIME_LABELS + END_TIME_LABELS) + r')"\s*,\s*(?P<value>[0-9.]+)'
+)
+
 def excel_to_str(excel_float: str) -> str:
     try:
         x = float(excel_float)
@@ -214,27 +285,27 @@ def quick_extract_metadata(folder: Path, log=None) -> dict:
             raw = fh.read()
         text = raw[BINARY_HEADER_SIZE:].decode("utf-8", errors="ignore")
 
-        import re
-        simple = {
-            "StudyName": r'\(\."StudyName",\s*"([^"]+)"\)',
-            "EegNo": r'\(\."EegNo",\s*"([^"]+)"\)',
-            "Machine": r'\(\."Machine",\s*"([^"]+)"\)'
-        }
         out = {}
-        for k, pat in simple.items():
-            m = re.search(pat, text)
+        for k, pat in SIMPLE_FIELDS_RE:
+            m = pat.search(text)
             if m:
                 out[k] = m.group(1)
 
+        first_hit = {}
+        for m in TIMES_RE.finditer(text):
+            first_hit.setdefault(m.group("label").lower(), m.group("value"))
+            if "recordingstarttime" in first_hit and "recordingendtime" in first_hit:
+                break  # preferred labels found, nothing later can win
+
         def grab_times(labels):
             for lbl in labels:
-                m = re.search(rf'"{lbl}"\s*,\s*([0-9.]+)', text, flags=re.IGNORECASE)
-                if m:
-                    return excel_to_str(m.group(1))
+                value = first_hit.get(lbl.lower())
+                if value is not None:
+                    return excel_to_str(value)
             return ""
 
-        out["RecordingStartTime"] = grab_times(["RECORDINGSTARTTIME","StartTime","Start_Time","RecStart"])
-        out["RecordingEndTime"]   = grab_times(["RECORDINGENDTIME","EndTime","End_Time","RecEnd"])
+        out["RecordingStartTime"] = grab_times(START_TIME_LABELS)
+        out["RecordingEndTime"]   = grab_times(END_TIME_LABELS)
         return out
 
     except Exception as e:
@@ -670,8 +741,29 @@ class FolderRow:
         self.machine = ""
         
         
+def iter_file_entries(folder):
+    """
+    Yield os.DirEntry objects for every file under folder, like os.walk
+    (unreadable directories are skipped, symlinked directories not followed).
+    """
+    stack = [os.fspath(folder)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                        continue
+                except OSError:
+                    continue
+                yield entry
+
 def analyze_folder(folder: Path, log=None):
-    from os import walk
     date_counter = Counter()
     total_files = 0
     total_size = 0
@@ -679,24 +771,24 @@ def analyze_folder(folder: Path, log=None):
     has_eeg = False
 
     try:
-        for root, _, files in walk(folder):
-            rp = Path(root)
-            for fn in files:
-                p = rp / fn
-                try:
-                    e = safe_earliest_ts(p)
-                    l = safe_latest_ts(p)
-                    date_counter[to_date_floor(e)] += 1
-                    total_files += 1
-                    total_size += p.stat().st_size
-                    if l > latest:
-                        latest = l
-                    if p.suffix.lower() in (".eeg", ".ent"):
-                        has_eeg = True
-                except Exception as ex:
-                    if log:
-                        log(f"[scan] {p}: {ex}")
-                    continue
+        for entry in iter_file_entries(folder):
+            try:
+                # One stat per file; on Windows DirEntry.stat() is served
+                # from the directory listing without another syscall.
+                st = entry.stat()
+                e = min(st.st_ctime, st.st_mtime)
+                l = max(st.st_ctime, st.st_mtime)
+                date_counter[to_date_floor(e)] += 1
+                total_files += 1
+                total_size += st.st_size
+                if l > latest:
+                    latest = l
+                if os.path.splitext(entry.name)[1].lower() in (".eeg", ".ent"):
+                    has_eeg = True
+            except Exception as ex:
+                if log:
+                    log(f"[scan] {entry.path}: {ex}")
+                continue
     except Exception as e:
         if log:
             log(f"[scan-root] {folder}: {e}")
@@ -743,6 +835,10 @@ class App(tk.Tk):
         # progress state
         self._progress_total = 0
         self._progress_value = 0
+        self._progress_lock = threading.Lock()
+        self._progress_pending = 0
+        self._progress_text = None
+        self._progress_scheduled = False
 
         # worker threads
         self._scan_thread = None
@@ -1005,11 +1101,27 @@ class App(tk.Tk):
         self.after(0, _do)
 
     def _progress_step(self, step=1, text=None):
+        # Workers call this once per item; coalesce bursts so the Tk event
+        # queue gets one redraw per batch instead of one per file.
+        with self._progress_lock:
+            self._progress_pending += step
+            if text is not None:
+                self._progress_text = text
+            if self._progress_scheduled:
+                return
+            self._progress_scheduled = True
+
         def _do():
-            self._progress_value = min(self._progress_value + step, self._progress_total)
+            with self._progress_lock:
+                pending = self._progress_pending
+                latest_text = self._progress_text
+                self._progress_pending = 0
+                self._progress_text = None
+                self._progress_scheduled = False
+            self._progress_value = min(self._progress_value + pending, self._progress_total)
             self.progress["value"] = self._progress_value
-            if text is not None:
-                self.progress_label.config(text=text)
+            if latest_text is not None:
+                self.progress_label.config(text=latest_text)
             self.update_idletasks()
         self.after(0, _do)
 
@@ -1607,7 +1719,7 @@ class App(tk.Tk):
                     break
 
                 self.log(f"[{idx}/{total}] copying: {src} -> {t}")
-                shutil.copytree(src, t)
+                copytree_parallel(src, t, stop_event=self._stop_event)
                 self._progress_step(step=1, text=f"Copying... {idx}/{total or 1}")
 
             if not self._stop_event.is_set():
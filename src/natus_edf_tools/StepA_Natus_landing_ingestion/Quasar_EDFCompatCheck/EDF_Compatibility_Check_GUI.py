@@ -9,12 +9,13 @@ from datetime import datetime, timedelta
 from tkinter import Tk, StringVar, IntVar, BooleanVar, filedialog, ttk, messagebox, N, S, E, W
 
 # === Your existing checker ===
-# Expecting: check_edf_compatibility(edfbrowser_path: str, edf_path: str) -> None
+# Expecting: check_edf_compatibility(edfbrowser_path: str, edf_path: str, markers_checked: bool) -> None
 from natus_edf_tools.StepA_Natus_landing_ingestion.Quasar_EDFCompatCheck.EDF_Compatibility_Check_tool import check_edf_compatibility
 
 # ---------- Defaults ----------
 DEFAULT_SCAN_INTERVAL_SEC = 10
 DEFAULT_SUBDIR_REGEX = r"sub-\d+"               # make this looser if you want (e.g., r"sub-[A-Za-z0-9]+")
+DEFAULT_SUBDIR_RE = re.compile(DEFAULT_SUBDIR_REGEX, re.IGNORECASE)
 DEFAULT_PRUNE_TOPLEVEL = True                   # only descend into top-level subject folders
 FILE_STABILITY_AGE_SEC = 20                     # if mtime newer than this, consider "still being written"
 INI_NAME = "edf_checker.ini"
@@ -36,21 +37,48 @@ def save_config(cfg):
         cfg.write(f)
 
 # ---------- File stability / lock checks ----------
-def is_file_locked_via_rename(filepath: str) -> bool:
-    base, ext = os.path.splitext(filepath)
-    tmp = f"{base}.__lockcheck__{ext}"
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                      wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+    _kernel32.CreateFileW.restype = wintypes.HANDLE
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    _GENERIC_READ = 0x80000000
+    _OPEN_EXISTING = 3
+    _ERROR_SHARING_VIOLATION = 32
+    _INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+else:
+    import fcntl
+
+
+def is_file_locked(filepath: str) -> bool:
+    """
+    Non-destructive lock probe (no rename, the directory is left untouched).
+    Windows: exclusive (share mode 0) open fails with a sharing violation while
+    any other process still has the file open.
+    POSIX: a non-blocking shared flock fails while a writer holds LOCK_EX.
+    """
+    if os.name == "nt":
+        handle = _kernel32.CreateFileW(filepath, _GENERIC_READ, 0, None, _OPEN_EXISTING, 0, None)
+        if handle == _INVALID_HANDLE_VALUE:
+            return ctypes.get_last_error() == _ERROR_SHARING_VIOLATION
+        _kernel32.CloseHandle(handle)
+        return False
+
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return True
     try:
-        os.replace(filepath, tmp)
-        os.replace(tmp, filepath)
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
         return False
-    except Exception:
-        # best effort revert if first rename succeeded but second failed
-        if os.path.exists(tmp) and not os.path.exists(filepath):
-            try:
-                os.replace(tmp, filepath)
-            except Exception:
-                pass
+    except OSError:
         return True
+    finally:
+        os.close(fd)
 
 def is_file_stable_by_age(filepath: str, min_age_sec: int = FILE_STABILITY_AGE_SEC) -> bool:
     try:
@@ -99,7 +127,7 @@ def is_file_ready(filepath: str,
         return False
 
     # Windows lock test
-    if is_file_locked_via_rename(filepath):
+    if is_file_locked(filepath):
         return False
 
     # Readability test
@@ -115,23 +143,43 @@ def should_prune_to_subjects(root: str, main_folder: str) -> bool:
     # normalize to avoid trailing slash issues
     return os.path.normcase(os.path.normpath(root)) == os.path.normcase(os.path.normpath(main_folder))
 
-def discover_edfs(main_folder: str, subdir_regex: re.Pattern, prune_top: bool) -> list[str]:
+def discover_edfs(main_folder: str, subdir_regex: re.Pattern, prune_top: bool,
+                  marked: set | None = None) -> list[str]:
+    # Top-down scandir walk (same order as os.walk) so directory/file
+    # classification comes from the listing instead of a stat per entry.
+    # If `marked` is given, EDFs with a .edf_pass/.edf_fail sibling are added
+    # to it, checked against the same listing (no exists() per file).
     edfs = []
-    for root, dirs, files in os.walk(main_folder, topdown=True):
-        if prune_top and should_prune_to_subjects(root, main_folder):
-            if subdir_regex == None:
-                pass
-            else:
-                dirs[:] = [d for d in dirs if subdir_regex.fullmatch(d)]
-        for name in files:
-            if name.lower().endswith(".edf"):
-                edfs.append(os.path.join(root, name))
+    stack = [main_folder]
+    while stack:
+        root = stack.pop()
+        subdirs = []
+        found = []
+        names = set()
+        try:
+            it = os.scandir(root)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry)
+                    continue
+                names.add(os.path.normcase(entry.name))
+                if entry.name.lower().endswith(".edf"):
+                    found.append(entry)
+        for entry in found:
+            edfs.append(entry.path)
+            if marked is not None:
+                stem = os.path.normcase(entry.name[:-4])  # name ends with ".edf"
+                if stem + ".edf_pass" in names or stem + ".edf_fail" in names:
+                    marked.add(entry.path)
+        if prune_top and subdir_regex is not None and should_prune_to_subjects(root, main_folder):
+            subdirs = [d for d in subdirs if subdir_regex.fullmatch(d.name)]
+        stack.extend(d.path for d in reversed(subdirs))
     return edfs
 
-def has_marker_files(edf_path: str) -> bool:
-    base, _ = os.path.splitext(edf_path)
-    return os.path.exists(base + ".edf_pass") or os.path.exists(base + ".edf_fail")
-
 # ---------- Formatting ----------
 def fmt_bytes(n: int) -> str:
     if n is None:
@@ -172,21 +220,27 @@ class CheckerWorker(threading.Thread):
     def run(self):
         last_discovery = 0.0
         pending = []
+        # Subject-folder regex is only recompiled when the user edits it
+        subre_src = None
+        subre = None
         while not self.stop_ev.is_set():
             now = time.time()
             # Rediscover periodically (scan interval)
             if now - last_discovery >= self.state.scan_interval():
                 last_discovery = now
-                try:
-                    subre = re.compile(self.state.subdir_regex.get(), re.IGNORECASE)
-                except re.error as e:
-                    self._post(status=f"[Regex error] {e}. Using default {DEFAULT_SUBDIR_REGEX}")
-                    subre = re.compile(DEFAULT_SUBDIR_REGEX, re.IGNORECASE)
-                    subre = None
+                src = self.state.subdir_regex.get()
+                if src != subre_src:
+                    subre_src = src
+                    try:
+                        subre = re.compile(src, re.IGNORECASE)
+                    except re.error as e:
+                        self._post(status=f"[Regex error] {e}. Using default {DEFAULT_SUBDIR_REGEX}")
+                        subre = DEFAULT_SUBDIR_RE
 
-                all_edfs = discover_edfs(self.state.main_folder.get(), subre, self.state.prune_top.get())
+                marked = set()
+                all_edfs = discover_edfs(self.state.main_folder.get(), subre, self.state.prune_top.get(), marked)
                 # filter out already marked pass/fail and already processed in this session
-                candidates = [p for p in all_edfs if not has_marker_files(p) and p not in self.processed_this_session]
+                candidates = [p for p in all_edfs if p not in marked and p not in self.processed_this_session]
                 # keep only those that look ready
                 ready = [p for p in candidates if is_file_ready(p)]
 
@@ -217,7 +271,7 @@ class CheckerWorker(threading.Thread):
 
                 t0 = time.time()
                 try:
-                    check_edf_compatibility(self.state.edfbrowser_path.get(), edf_path)
+                    check_edf_compatibility(self.state.edfbrowser_path.get(), edf_path, markers_checked=True)
                     ok = True
                     err = ""
                 except Exception as e:
@@ -1,39 +1,17 @@
 import argparse
 import subprocess
-import time
-from datetime import datetime
 import os
 import sys
-import threading
-import itertools
-import sys
-
-def spinner_task(stop_event):
-    spinner = itertools.cycle(['|', '/', '-', '\\'])
-    while not stop_event.is_set():
-        sys.stdout.write(f"\rChecking... {next(spinner)}")
-        sys.stdout.flush()
-        time.sleep(0.1)
-    sys.stdout.write("\rDone.           \n")
-    sys.stdout.flush()
-
-def check_edf_compatibility(edfbrowser_path, edf_file_path):
-    # Skip if already processed
-    base_name = os.path.basename(edf_file_path)
-    dir_path = os.path.dirname(edf_file_path)
-    base_no_ext = os.path.splitext(base_name)[0]
-
-    pass_file = os.path.join(dir_path, base_no_ext + ".edf_pass")
-    fail_file = os.path.join(dir_path, base_no_ext + ".edf_fail")
-
-    if os.path.exists(pass_file) or os.path.exists(fail_file):
-        print(f"Skipping (already processed): {edf_file_path}")
-        return
-
-    start_time = time.time()
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-    output_file_temp = "output_temp.txt"
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def check_edf_compatibility(edfbrowser_path, edf_file_path, markers_checked=False):
+    # Skip if already processed (callers that filtered on the .edf_pass /
+    # .edf_fail sentinels themselves pass markers_checked=True)
+    if not markers_checked:
+        base = os.path.splitext(edf_file_path)[0]
+        if os.path.exists(base + ".edf_pass") or os.path.exists(base + ".edf_fail"):
+            print(f"Skipping (already processed): {edf_file_path}")
+            return
 
     command = [
         edfbrowser_path,
@@ -41,16 +19,11 @@ def check_edf_compatibility(edfbrowser_path, edf_file_path):
         edf_file_path
     ]
 
-    stop_event = threading.Event()
-    spinner_thread = threading.Thread(target=spinner_task, args=(stop_event,))
-    #spinner_thread.start()
-
     try:
-        with open(output_file_temp, "w", encoding='utf-8') as outfile:
-            result = subprocess.run(command, stdout=outfile, stderr=subprocess.STDOUT)
+        # edfbrowser reports through the .edf_pass/.edf_fail sentinels; its
+        # console output was never read, so don't write it to disk.
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except Exception as e:
-        #stop_event.set()
-        #spinner_thread.join()
         print(f"Fail! Error running edfbrowser: {e}")
         return
 
@@ -59,28 +32,40 @@ def check_edf_compatibility(edfbrowser_path, edf_file_path):
 
 
 def find_edf_files(folder, recursive=False):
+    # os.scandir: DirEntry.is_dir()/is_file() answer from the directory
+    # listing, so no extra stat per entry (os.walk order is preserved).
     edf_files = []
     cnt = 0
     line_end = 0
-    if recursive:
-        for root, _, files in os.walk(folder):            
-            for f in files:
-                cnt += 1
-                if cnt > 1000:
-                    print(".",end="",flush=True)
-                    line_end += 1
-                    cnt = 0
-                    if line_end > 80:
-                        print("\r\n")
-                        line_end = 0
-                        
-                if f.lower().endswith(".edf"):
-                    edf_files.append(os.path.join(root, f))
-    else:
-        for f in os.listdir(folder):
-            full_path = os.path.join(folder, f)
-            if os.path.isfile(full_path) and f.lower().endswith(".edf"):
-                edf_files.append(full_path)
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            it = os.scandir(current)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if recursive:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    cnt += 1
+                    if cnt > 1000:
+                        print(".",end="",flush=True)
+                        line_end += 1
+                        cnt = 0
+                        if line_end > 80:
+                            print("\r\n")
+                            line_end = 0
+                elif not entry.is_file():
+                    continue
+
+                if entry.name.lower().endswith(".edf"):
+                    edf_files.append(entry.path)
+        stack.extend(reversed(subdirs))
     return edf_files
 
 def main():
@@ -92,6 +77,9 @@ def main():
     group.add_argument('--folder', help='Folder to search for EDF files')
 
     parser.add_argument('--recursive', action='store_true', help='Search folders recursively if --folder is used')
+    # The checks all read the same disk; more than a few at once only thrash it
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Number of edfbrowser checks to run at once with --folder (default: 4)')
 
     args = parser.parse_args()
 
@@ -115,9 +103,15 @@ def main():
             print("[!] No EDF files found.")
             return
         
-        for edf_file in edf_files:
-            print(f"Checking file: {edf_file}")
-            check_edf_compatibility(args.edfbrowser, edf_file)
+        # Each check is a separate edfbrowser process, so threads only wait on
+        # subprocesses and N of them keep N edfbrowser instances busy.
+        print(f"Checking {len(edf_files)} file(s) with {max(1, args.workers)} worker(s)")
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {pool.submit(check_edf_compatibility, args.edfbrowser, edf_file): edf_file
+                       for edf_file in edf_files}
+            for fut in as_completed(futures):
+                fut.result()
+                print(f"Checked file: {futures[fut]}")
 
 if __name__ == "__main__":
     main()
@@ -14,49 +14,120 @@ import argparse
 import logging
 import hashlib
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 import json
+import csv
+import math
 import struct
+import gzip
 from pathlib import Path
 import pandas as pd
 import zipfile
 import rarfile
 import py7zr
-
-# Ensure local EDF reader is on path
-
-from common_libs.edflib_fork_mld.edfreader_mld2 import EDFreader
+from common_libs.edflib_fork_mld.edf_raw_header import (
+    EDF_HEADER_SIZE, parse_edf_header, read_edf_headers, edf_data_size)
 
 # EDF file extensions (including archives)
-EDF_EXTS = ['.edf', '.edf.gz', '.edf.zip', '.edf.rar', '.edf.7z']
+EDF_EXTS = frozenset(['.edf', '.edf.gz', '.edf.zip', '.edf.rar', '.edf.7z'])
+SIDECAR_EXTS = frozenset(['.tsv', '.json', '.log', '.md5'])
+HASH_CHUNK = 8 * 1024 * 1024   # multi-GB EDFs: few large reads, not 8 KiB syscalls
 
 # Logging setup
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s %(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
-def compute_md5(path: Path) -> str:
+def _read_md5_sidecar(path: Path):
+    """Digest from <path>.md5, or None if missing or older than the data file."""
     md5_file = path.with_suffix(path.suffix + '.md5')
-    if md5_file.exists():
-        try:
+    try:
+        if md5_file.stat().st_mtime >= path.stat().st_mtime:
             return md5_file.read_text().strip().split()[0]
-        except Exception:
-            pass
-    hash_md5 = hashlib.md5()
-    with path.open('rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            hash_md5.update(chunk)
-    checksum = hash_md5.hexdigest()
+    except Exception:
+        pass
+    return None
+
+
+def _write_md5_sidecar(path: Path, checksum: str):
+    md5_file = path.with_suffix(path.suffix + '.md5')
     try:
         md5_file.write_text(f"{checksum}  {path.name}\n")
     except Exception as e:
         logger.warning(f"Could not write MD5 file {md5_file}: {e}")
+
+
+def _md5_stream(f, hash_md5) -> str:
+    """Feed the rest of f into hash_md5 through one reused HASH_CHUNK buffer."""
+    buf = memoryview(bytearray(HASH_CHUNK))
+    while n := f.readinto(buf):
+        hash_md5.update(buf[:n])
+    return hash_md5.hexdigest()
+
+
+def compute_md5(path: Path) -> str:
+    checksum = _read_md5_sidecar(path)
+    if checksum is not None:
+        return checksum
+    with path.open('rb', buffering=0) as f:
+        checksum = _md5_stream(f, hashlib.md5())
+    _write_md5_sidecar(path, checksum)
     return checksum
 
 
+def read_archived_edf_header(path: Path) -> bytes:
+    """
+    Raw EDF header of a compressed EDF, inflating only its first bytes.
+    Only .gz and .zip can be streamed cheaply; other archives raise ValueError.
+    """
+    ext = ''.join(path.suffixes).lower()
+    if ext.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            return f.read(EDF_HEADER_SIZE)
+    if ext.endswith('.zip'):
+        with zipfile.ZipFile(path, 'r') as zf:
+            names = [n for n in zf.namelist() if n.lower().endswith('.edf')] or zf.namelist()
+            with zf.open(names[0]) as f:
+                return f.read(EDF_HEADER_SIZE)
+    raise ValueError(f"EDF header not read from {ext} archive")
+
+
+def scan_edf(path: Path):
+    """
+    Open a plain .edf once: return its raw header and MD5, hashing from the
+    same handle unless a fresh .md5 sidecar already holds the digest.
+    """
+    checksum = _read_md5_sidecar(path)
+    with path.open('rb', buffering=0) as f:
+        hdr = f.read(EDF_HEADER_SIZE)
+        if checksum is None:
+            checksum = _md5_stream(f, hashlib.md5(hdr))
+            _write_md5_sidecar(path, checksum)
+    return hdr, checksum
+
+
+def _edf_gz_size(path: Path):
+    """
+    Uncompressed size of an .edf.gz computed from its EDF header (only the
+    first few KB are inflated). None if the header does not allow it.
+    """
+    try:
+        with gzip.open(path, 'rb') as f:
+            return edf_data_size(*read_edf_headers(f))
+    except (OSError, EOFError, ValueError):
+        return None
+
+
 def get_uncompressed_size(path: Path) -> int:
     ext = ''.join(path.suffixes).lower()
     try:
         if ext.endswith('.gz'):
+            # The gzip trailer only holds the size modulo 4 GiB, which is
+            # wrong for long recordings; prefer the EDF header when present.
+            if ext.endswith('.edf.gz'):
+                size = _edf_gz_size(path)
+                if size is not None:
+                    return size
             with open(path, 'rb') as f:
                 f.seek(-4, os.SEEK_END)
                 return struct.unpack('<I', f.read(4))[0]
@@ -74,60 +145,75 @@ def get_uncompressed_size(path: Path) -> int:
     return path.stat().st_size
 
 
-def parse_input_dirs(input_dirs: list, subject: str) -> pd.DataFrame:
+def _scan_session(root: Path, sess: Path, subject: str) -> dict:
+    """Build the schema record for one session folder (EDF size, MD5, header)."""
+    sess_files = list(sess.iterdir())
+    # locate EDF file
+
+    def is_edf_like(f: Path) -> bool:
+        return ''.join(f.suffixes).lower() in EDF_EXTS
+
+    edf_files = [f for f in sess_files if is_edf_like(f)]
+
+    edf_path = edf_files[0] if edf_files else None
+    if not edf_path:
+        logger.warning(f"No EDF found in {sess}")
+    elif len(edf_files) > 1:
+        logger.warning(f"Multiple EDFs in {sess}, using {edf_path.name}")
+    # metadata presence
+    tsv_present = any(f.suffix.lower() == '.tsv' for f in sess_files)
+    json_present = any(f.suffix.lower() == '.json' for f in sess_files)
+    # unexpected files
+    other = [f.name for f in sess_files if edf_path and f != edf_path and f.suffix.lower() not in ['.tsv', '.json']]
+    # defaults
+    size = None; checksum = None; acq_time = None; duration = None
+    if edf_path and edf_path.exists():
+        size = get_uncompressed_size(edf_path)
+        if edf_path.name.lower().endswith('.edf'):
+            # Header fields and MD5 from a single open/read pass
+            hdr, checksum = scan_edf(edf_path)
+            try:
+                start, duration = parse_edf_header(hdr)
+                acq_time = start.isoformat()
+            except ValueError as e:
+                logger.warning(f"EDF header parse error for {edf_path}: {e}")
+        else:
+            checksum = compute_md5(edf_path)
+            try:
+                start, duration = parse_edf_header(read_archived_edf_header(edf_path))
+                acq_time = start.isoformat()
+            except Exception as e:
+                logger.warning(f"EDF header parse error for {edf_path}: {e}")
+    task_guess = sess.name.split('_')[0] if '_' in sess.name else 'unknown'
+    return {
+        'subject': subject,
+        'source_root': str(root),
+        'session_folder': sess.name,
+        'edf_path': str(edf_path) if edf_path else '',
+        'tsv_present': tsv_present,
+        'json_present': json_present,
+        'other_files': ';'.join(other),
+        'file_size': size,
+        'checksum': checksum,
+        'acq_time': acq_time,
+        'duration': duration,
+        'task': task_guess
+    }
+
+
+def parse_input_dirs(input_dirs: list, subject: str, workers: int = None) -> pd.DataFrame:
     """Scan each input root, parse all immediate subfolders as sessions, extract EDF metadata."""
-    records = []
+    sessions = []
     for root in input_dirs:
         root = Path(root)
         if not root.is_dir():
             logger.error(f"Input root {root} is not a directory")
             continue
-        for sess in sorted([d for d in root.iterdir() if d.is_dir()]):
-            sess_files = list(sess.iterdir())
-            # locate EDF file
-            
-            def is_edf_like(f: Path) -> bool:
-                return ''.join(f.suffixes).lower() in EDF_EXTS
-
-            edf_files = [f for f in sess_files if is_edf_like(f)]
-
-            
-            edf_path = edf_files[0] if edf_files else None
-            if not edf_path:
-                logger.warning(f"No EDF found in {sess}")
-            elif len(edf_files) > 1:
-                logger.warning(f"Multiple EDFs in {sess}, using {edf_path.name}")
-            # metadata presence
-            tsv_present = any(f.suffix.lower() == '.tsv' for f in sess_files)
-            json_present = any(f.suffix.lower() == '.json' for f in sess_files)
-            # unexpected files
-            other = [f.name for f in sess_files if edf_path and f != edf_path and f.suffix.lower() not in ['.tsv', '.json']]
-            # defaults
-            size = None; checksum = None; acq_time = None; duration = None
-            if edf_path and edf_path.exists():
-                size = get_uncompressed_size(edf_path)
-                checksum = compute_md5(edf_path)
-                try:
-                    reader = EDFreader(str(edf_path), read_annotations=False)
-                    acq_time = reader.getStartDateTime().isoformat()
-                    duration = reader.getFileDuration()
-                except Exception as e:
-                    logger.warning(f"EDF header parse error for {edf_path}: {e}")
-            task_guess = sess.name.split('_')[0] if '_' in sess.name else 'unknown'
-            records.append({
-                'subject': subject,
-                'source_root': str(root),
-                'session_folder': sess.name,
-                'edf_path': str(edf_path) if edf_path else '',
-                'tsv_present': tsv_present,
-                'json_present': json_present,
-                'other_files': ';'.join(other),
-                'file_size': size,
-                'checksum': checksum,
-                'acq_time': acq_time,
-                'duration': duration,
-                'task': task_guess
-            })
+        sessions.extend((root, sess) for sess in sorted([d for d in root.iterdir() if d.is_dir()]))
+    # Sessions are independent and the work is file reads + MD5 (hashlib
+    # drops the GIL), so a thread pool overlaps them; map keeps the order.
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        records = list(pool.map(lambda rs: _scan_session(rs[0], rs[1], subject), sessions))
     return pd.DataFrame(records)
 
 
@@ -135,17 +221,21 @@ def detect_duplicate_sessions(df: pd.DataFrame) -> pd.DataFrame:
     """Group sessions by file size + checksum to detect duplicates."""
     df = df.copy()
     df['group_id'] = df.groupby(['file_size', 'checksum'], sort=False).ngroup() + 1
+    # First session of each group is kept, later ones are duplicates; sessions
+    # without an EDF have no group (NaN) and are never duplicates of each other
     df['action'] = 'keep'
-    for gid, grp in df.groupby('group_id'):
-        for dup_idx in grp.index[1:]:
-            df.at[dup_idx, 'action'] = 'skip'
+    dup = df.duplicated(subset=['group_id'], keep='first') & df['group_id'].notna()
+    df.loc[dup, 'action'] = 'skip'
     return df
 
 
 def assign_global_sessions(df: pd.DataFrame) -> pd.DataFrame:
     """Assign BIDS-style global session numbers based on group_id."""
     df = df.copy()
-    df['global_ses'] = df['group_id'].apply(lambda x: f"{x:03d}")
+    # group_id is float once a session without an EDF leaves a NaN in it;
+    # go through Int64 so '1' stays '001' and EDF-less sessions get ''.
+    gid = df['group_id'].astype('Int64')
+    df['global_ses'] = gid.astype('string').str.zfill(3).fillna('').astype(object)
     return df
 
 
@@ -153,29 +243,25 @@ def assign_global_sessions(df: pd.DataFrame) -> pd.DataFrame:
 def generate_schema(df: pd.DataFrame, subject: str, schema_out: str):
     df = df.copy()
 
-    def compute_target_filename(row):
-        edf_path = Path(row['edf_path']) if row['edf_path'] else None
-        if not edf_path:
-            return ""
-
-        basename = edf_path.name
-        task = str(row['task']).strip() if pd.notna(row['task']) and str(row['task']).strip() else 'unknown'
-
-        if '_task-' in basename:
-            parts = basename.split('_task-')
-            left = parts[0]
-            right = parts[1]
-            if '_' in right:
-                suffix = right.split('_', 1)[1]
-                return f"{left}_task-{task}_{suffix}"
-            else:
-                return f"{left}_task-{task}_{right}"
-        else:
-            ext = ''.join(edf_path.suffixes)
-            ses = str(row['global_ses']).zfill(3)
-            return f"sub-{subject}_ses-{ses}_task-{task}_run-01{ext}"
+    # Target filenames, built column-wise instead of a row-wise apply
+    names = df['edf_path'].map(lambda p: Path(p).name if p else '').astype(str)
+    exts = names.map(lambda n: ''.join(Path(n).suffixes)).astype(str)
+    task_str = df['task'].astype(str).str.strip()
+    task = task_str.where(df['task'].notna() & (task_str != ''), 'unknown')
+    ses = df['global_ses'].astype(str).str.zfill(3)
+
+    target = 'sub-' + subject + '_ses-' + ses + '_task-' + task + '_run-01' + exts
+
+    # Names that already carry _task-: swap in the task label, keep the rest.
+    # Only those rows are split, so every .str input below is a string.
+    has_task = names.str.contains('_task-', regex=False)
+    if has_task.any():
+        parts = names[has_task].str.split('_task-')
+        right = parts.str[1]
+        rest = right.str.split('_', n=1).str[1].fillna(right)
+        target[has_task] = parts.str[0] + '_task-' + task[has_task] + '_' + rest
 
-    df['target_filename'] = df.apply(compute_target_filename, axis=1)
+    df['target_filename'] = target.where(names != '', '')
 
     schema_cols = [
         'source_root', 'session_folder', 'edf_path', 'target_filename', 'action', 'group_id',
@@ -186,13 +272,42 @@ def generate_schema(df: pd.DataFrame, subject: str, schema_out: str):
     schema_df = df[schema_cols]
     schema_df.to_excel(schema_out, index=False, sheet_name='Schema')
     logger.info(f"Schema written to {schema_out}")
+    return schema_df
 
 
 
+def _name_parts(name: str):
+    """
+    (stem, suffix, all suffixes) of a file name with pathlib's rules for
+    .stem / .suffix / ''.join(.suffixes), split once from the string.
+    """
+    dot = name.rfind('.')
+    if not 0 < dot < len(name) - 1:
+        return name, '', ''
+    bare = name.lstrip('.')
+    return name[:dot], name[dot:], bare[bare.find('.'):]
+
+
+def fast_move(src: Path, dst: Path):
+    """Plain rename on the same volume; shutil.move (copy + delete) otherwise."""
+    try:
+        os.rename(src, dst)
+    except OSError:
+        shutil.move(str(src), str(dst))
+
+
 def apply_schema(schema_excel: str, proceed: bool):
+    """Apply the schema saved in schema_excel (BIDS tree rooted beside it)."""
     df = pd.read_excel(schema_excel, sheet_name='Schema')
-    root = Path(schema_excel).parent
+    apply_schema_df(df, Path(schema_excel).parent, proceed)
+
 
+def apply_schema_df(df: pd.DataFrame, root: Path, proceed: bool):
+    """
+    Apply an in-memory schema (as returned by generate_schema) under root,
+    for callers that just built it and need not re-read the Excel file.
+    """
+    root = Path(root)
     scans_records = []
 
     for _, r in df.iterrows():
@@ -211,14 +326,13 @@ def apply_schema(schema_excel: str, proceed: bool):
         target_stem = Path(target_filename).stem
         original_stem = edf_path.stem
 
-        for f in src_folder.iterdir():
-            if not f.is_file():
-                continue
-
-            suffixes = ''.join(f.suffixes).lower()
-            ext = f.suffix.lower()
+        with os.scandir(src_folder) as it:
+            files = [entry for entry in it if entry.is_file()]
+        for entry in files:
+            f = Path(entry.path)
+            stem, ext, suffixes = _name_parts(entry.name)
 
-            if suffixes in EDF_EXTS:
+            if suffixes.lower() in EDF_EXTS:
                 dst = dest_ieeg / target_filename
                 if r['acq_time'] and r['duration']:
                     scans_records.append({
@@ -228,16 +342,16 @@ def apply_schema(schema_excel: str, proceed: bool):
                         'acq_time': r['acq_time'],
                         'duration': r['duration']
                     })
-            elif ext in ['.tsv', '.json', '.log', '.md5'] and original_stem in f.stem:
-                extra = f.name.replace(original_stem, '')
+            elif ext.lower() in SIDECAR_EXTS and original_stem in stem:
+                extra = entry.name.replace(original_stem, '')
                 dst = dest_ieeg / (target_stem + extra)
             else:
-                logger.warning(f"Unexpected or unmatched file {f.name} in {src_folder}")
-                dst = dest_ieeg / f.name
+                logger.warning(f"Unexpected or unmatched file {entry.name} in {src_folder}")
+                dst = dest_ieeg / entry.name
 
             logger.info(f"{'DRY-RUN: ' if not proceed else ''}Moving {f} -> {dst}")
             if proceed:
-                shutil.move(str(f), str(dst))
+                fast_move(f, dst)
 
         if proceed:
             try:
@@ -247,11 +361,19 @@ def apply_schema(schema_excel: str, proceed: bool):
 
     # Write scans.tsv and scans.json into subject root
     if proceed and scans_records:
-        scans_df = pd.DataFrame(scans_records)
+        # Rows are already plain dicts: write them straight out. Missing
+        # values (NaN from the Excel schema) become empty cells / null.
+        scans_records = [{k: None if isinstance(v, float) and math.isnan(v) else v
+                          for k, v in rec.items()} for rec in scans_records]
         scans_tsv = root / f"sub-{subj}" / f"sub-{subj}_scans.tsv"
         scans_json = root / f"sub-{subj}" / f"sub-{subj}_scans.json"
-        scans_df.to_csv(scans_tsv, sep='\t', index=False)
-        scans_df.to_json(scans_json, orient='records', indent=2)
+        with open(scans_tsv, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.DictWriter(fh, fieldnames=list(scans_records[0]), delimiter='\t',
+                                    lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(scans_records)
+        with open(scans_json, 'w', encoding='utf-8') as fh:
+            json.dump(scans_records, fh, indent=2)
         logger.info(f"Scans TSV and JSON written to {scans_tsv.parent}")
 
 
@@ -270,6 +392,8 @@ def main():
                         help='If set, move files according to schema.')
     parser.add_argument('--simulate', action='store_true',
                         help='Simulate file moves without performing them.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Sessions scanned in parallel (default: CPU count).')
     args = parser.parse_args()
 
     if args.simulate:
@@ -278,7 +402,7 @@ def main():
     elif args.proceed_with_moving:
         apply_schema(args.schema_output, proceed=True)
     else:
-        df = parse_input_dirs(args.input, args.subject)
+        df = parse_input_dirs(args.input, args.subject, args.workers)
         df = detect_duplicate_sessions(df)
         df = assign_global_sessions(df)
         generate_schema(df, args.subject, args.schema_output)
@@ -8,6 +8,8 @@ from datetime import datetime
 
 # --- Import your EDF reader (relative two levels up, like your GUI script) ---
 from common_libs.edflib_fork_mld.edfreader_mld2 import EDFreader  # noqa: E402
+from common_libs.edflib_fork_mld.edf_raw_header import (  # noqa: E402
+    parse_edf_header, read_edf_headers, edf_data_size)
 
 
 # ------------------------------- ANSI helpers -------------------------------
@@ -27,18 +29,42 @@ def colorize(s: str, enabled: bool, color: str) -> str:
 
 # ------------------------------- EDF metadata -------------------------------
 
-def read_edf_metadata(path: Path):
+def read_edf_header_fields(path: Path, size_bytes: int):
+    """
+    (start datetime, duration) straight from the fixed-offset ASCII EDF
+    header, in EDFreader's units, without building an EDFreader.
+    Returns None unless the header is well formed and its record layout
+    accounts for exactly size_bytes (the caller then uses EDFreader).
+    """
+    with open(path, "rb") as f:
+        try:
+            hdr, sig = read_edf_headers(f)
+            fields = parse_edf_header(hdr)
+            size = edf_data_size(hdr, sig)
+        except ValueError:
+            return None
+    return fields if size == size_bytes else None
+
+
+def read_edf_metadata(path: Path, size_bytes: int | None = None):
     """
     Returns (size_bytes:int, start_iso:str 'YYYY-MM-DDTHH:MM:SS', duration_sec:float)
+    size_bytes may be passed in from a directory listing to skip the stat.
     Raises on error.
     """
-    size_bytes = path.stat().st_size
-    reader = EDFreader(str(path), read_annotations=False)
-    try:
-        start_dt = reader.getStartDateTime()  # datetime
-        dur_sec = float(reader.getFileDuration())  # seconds (float)
-    finally:
-        reader.close()
+    if size_bytes is None:
+        size_bytes = path.stat().st_size
+    fields = read_edf_header_fields(path, size_bytes)
+    if fields is not None:
+        start_dt, dur_ticks = fields
+        dur_sec = float(dur_ticks)
+    else:
+        reader = EDFreader(str(path), read_annotations=False)
+        try:
+            start_dt = reader.getStartDateTime()  # datetime
+            dur_sec = float(reader.getFileDuration())  # seconds (float)
+        finally:
+            reader.close()
     start_iso = start_dt.strftime("%Y-%m-%dT%H:%M:%S")
     return size_bytes, start_iso, dur_sec
 
@@ -63,9 +89,26 @@ def edf_pass_path(edf_path: Path) -> Path:
 # ------------------------------- Scanning -----------------------------------
 
 def iter_edf_files(root: Path):
-    for p in root.rglob("*.edf"):
-        if p.is_file():
-            yield p
+    """
+    Yield (path, size_bytes) for every *.edf under root. One scandir per
+    directory; sizes come from the listing (no separate stat on Windows).
+    Symlinked directories are not followed.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.normcase(entry.name).endswith(".edf") and entry.is_file():
+                        yield Path(entry.path), entry.stat().st_size
+                except OSError:
+                    continue
 
 
 def scan_tree(root: Path, color_enabled: bool):
@@ -76,9 +119,9 @@ def scan_tree(root: Path, color_enabled: bool):
       errors: [(Path, error_str)]
     """
     meta_by_path, key_to_paths, errors = {}, {}, []
-    for p in iter_edf_files(root):
+    for p, size_b in iter_edf_files(root):
         try:
-            size_b, start_iso, dur_s = read_edf_metadata(p)
+            size_b, start_iso, dur_s = read_edf_metadata(p, size_b)
             key = edf_key(size_b, start_iso, dur_s)
             meta_by_path[p] = (size_b, start_iso, f"{dur_s:.3f}")
             key_to_paths.setdefault(key, []).append(p)
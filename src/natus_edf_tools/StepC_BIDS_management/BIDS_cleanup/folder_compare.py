@@ -11,6 +11,7 @@ import os
 import hashlib
 import threading
 import configparser
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
 
@@ -64,19 +65,59 @@ def human_size(n):
     return f"{n:.1f} PB"
 
 
+HASH_CHUNK = 1024 * 1024
+
+
 def sha256_file(path):
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            h.update(chunk)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+: loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        buf = memoryview(bytearray(HASH_CHUNK))
+        while n := f.readinto(buf):
+            h.update(buf[:n])
     return h.hexdigest()
 
 
-def collect_files(root, ext_filter=None):
+# Directory listings on network shares are latency-bound, so several
+# directories are listed at once.
+SCAN_WORKERS = 16
+
+
+def _scan_one_dir(dirpath, ext_filter):
+    """
+    List a single directory.
+    Returns (subdirs, files) where files is a list of (abs_path, size).
+    Symlinked directories are not descended into (same as os.walk).
+    """
+    subdirs, files = [], []
+    try:
+        it = os.scandir(dirpath)
+    except OSError:
+        return subdirs, files
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+                if ext_filter and os.path.splitext(entry.name)[1].lower() != ext_filter:
+                    continue
+                # DirEntry.stat() reuses the directory listing data on Windows
+                files.append((entry.path, entry.stat().st_size))
+            except OSError:
+                pass
+    return subdirs, files
+
+
+def collect_files(root, ext_filter=None, max_workers=SCAN_WORKERS):
     """
     Return list of (abs_path, size) for every file under root.
     If ext_filter is a non-empty string, only files whose extension matches
     (case-insensitive) are included.  Examples: '.edf', 'edf', '.EDF'.
+    Directories are listed in parallel on a thread pool; the result is
+    sorted by path.
     """
     if ext_filter:
         # Normalise: ensure leading dot, lowercase
@@ -86,16 +127,17 @@ def collect_files(root, ext_filter=None):
         ext_filter = ext_filter.lower()
 
     files = []
-    for dirpath, _, filenames in os.walk(root):
-        for fn in filenames:
-            if ext_filter and Path(fn).suffix.lower() != ext_filter:
-                continue
-            fp = os.path.join(dirpath, fn)
-            try:
-                sz = os.path.getsize(fp)
-                files.append((fp, sz))
-            except OSError:
-                pass
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan_one_dir, root, ext_filter)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                subdirs, found = fut.result()
+                files.extend(found)
+                for d in subdirs:
+                    pending.add(pool.submit(_scan_one_dir, d, ext_filter))
+    # Directories finish in any order; sort so reports are stable run to run
+    files.sort()
     return files
 
 
@@ -177,8 +219,13 @@ def compare_partial(path_a, path_b, part="first"):
 
 
 def compare_checksum(path_a, path_b, progress_cb=None):
-    h_a = sha256_file(path_a)
-    h_b = sha256_file(path_b)
+    # Both files hash at once: hashlib releases the GIL while digesting, and
+    # A and B usually sit on different disks or shares.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fut_a = pool.submit(sha256_file, path_a)
+        fut_b = pool.submit(sha256_file, path_b)
+        h_a = fut_a.result()
+        h_b = fut_b.result()
     equal = h_a == h_b
     detail = (
         f"SHA-256 match ✓\n  {h_a}"